@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccountConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.account'
+
+    def ready(self):
+        from . import signal  # noqa: F401  (connects the receivers)
+        from main import checks  # noqa: F401  (registers the shared cache check)
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password, verify_password
+
+
+class HashingPoolBusy(Exception):
+    """Every hashing slot is taken, the request should be retried later."""
+
+
+class HashingPool:
+    """
+    # HashingPool
+    Size-limited thread pool for password hashing. PBKDF2 runs in hashlib
+    with the GIL released, so `workers` hashes proceed in parallel while
+    the event loop (or request thread) only waits on a future.
+
+    At most `workers + queue` jobs are admitted at once; beyond that run()
+    raises HashingPoolBusy right away instead of queueing without bound,
+    so a login burst is shed with 503s rather than starving other requests.
+    """
+
+    def __init__(self, workers, queue):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hashing")
+        self.slots = threading.BoundedSemaphore(workers + queue)
+
+    async def run(self, function, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingPoolBusy()
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        # Released when the hash finishes, even if the client went away
+        future.add_done_callback(lambda _: self.slots.release())
+        return await asyncio.wrap_future(future)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    getattr(settings, "PASSWORD_HASHING_WORKERS", None) or min(4, os.cpu_count() or 1),
+                    getattr(settings, "PASSWORD_HASHING_QUEUE", 32),
+                )
+    return _pool
+
+
+def _check(password, encoded):
+    """(is_correct, new encoded password when the hasher or its parameters changed)."""
+    is_correct, must_update = verify_password(password, encoded)
+    return is_correct, make_password(password) if is_correct and must_update else None
+
+
+async def amake_password(password):
+    return await get_pool().run(make_password, password)
+
+
+async def aauthenticate_user(username, password):
+    """
+    Async counterpart of authenticate() for the model backend, hashing in
+    the pool. Stored hashes made with an older hasher or work factor are
+    replaced on a successful login, like User.check_password() does.
+    Returns None for unknown, inactive or wrong-password users.
+    """
+    User = get_user_model()
+    try:
+        user = await User._default_manager.aget_by_natural_key(username)
+    except User.DoesNotExist:
+        # Hash anyway so unknown usernames take as long as wrong passwords
+        await amake_password(password)
+        return None
+
+    is_correct, rehashed = await get_pool().run(_check, password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+    if rehashed is not None:
+        user.password = rehashed
+        await user.asave(update_fields=["password"])
+    return user
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='reviews_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0003_customuser_reviews_count_index'),
+        ('book', '0007_book_rating_weighted'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='readinglist',
+            index=models.Index(fields=['user', 'status'], name='readinglist_user_status_idx'),
+        ),
+    ]
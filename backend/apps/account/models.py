@@ -1,7 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from apps.book.models import Book
-from django.db.models import Avg
+from django.db.models import Avg, F, Value
+from django.db.models.functions import Greatest
 
 # Create your models here.
 class CustomUser(AbstractUser):
@@ -19,7 +20,7 @@ class CustomUser(AbstractUser):
     bio = models.TextField(blank=True)
     profile_picture = models.URLField(blank=True)
     books_read_count = models.PositiveIntegerField(default=0)
-    reviews_count = models.PositiveIntegerField(default=0)
+    reviews_count = models.PositiveIntegerField(default=0, db_index=True)
 
     groups = models.ManyToManyField(
         "auth.Group",
@@ -74,10 +75,21 @@ class CustomUser(AbstractUser):
         self.save(update_fields=['rating_count', 'rating_avg'])
     
     def update_counts(self):
-        """Update the counts for books read and reviews"""
+        """Recompute the counts for books read and reviews (see reconcile_user_counters)"""
         self.books_read_count = self.read_books.count()
-        self.reviews_count = self.reviews.count()  # Assuming you have a Review model
-        self.save()
+        self.reviews_count = self.reviews.count()
+        self.save(update_fields=['books_read_count', 'reviews_count'])
+
+    @classmethod
+    def adjust_counts(cls, user_id, books_read=0, reviews=0):
+        """Apply counter deltas in a single UPDATE, never going below zero."""
+        changes = {}
+        if books_read:
+            changes['books_read_count'] = Greatest(F('books_read_count') + books_read, Value(0))
+        if reviews:
+            changes['reviews_count'] = Greatest(F('reviews_count') + reviews, Value(0))
+        if changes:
+            cls.objects.filter(pk=user_id).update(**changes)
 
     def __str__(self):
         return self.username
@@ -99,6 +111,30 @@ class ReadingList(models.Model):
     
     class Meta:
         unique_together = ['user', 'book']
+        indexes = [
+            # ?status= filters of a user's reading list
+            models.Index(fields=['user', 'status'], name='readinglist_user_status_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_status()
+        return instance
+
+    def remember_status(self):
+        """Snapshot the stored (user, status) so the signals can count status transitions."""
+        deferred = self.get_deferred_fields()
+        if 'user_id' in deferred or 'status' in deferred:
+            self._stored_status = None
+        else:
+            self._stored_status = (self.user_id, self.status)
+
+    def get_stored_status(self):
+        stored = getattr(self, '_stored_status', None)
+        if stored is None and self.pk is not None:
+            stored = ReadingList.objects.filter(pk=self.pk).values_list('user_id', 'status').first()
+        return stored
         
     @property
     def read_books(self):
@@ -1,12 +1,32 @@
 from .models import CustomUser, ReadingList
 from rest_framework import serializers
 from apps.book.models import Book
+from django.db.models import Prefetch
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
+    """The signed-in user's own account, returned on login and registration."""
     class Meta:
         model = CustomUser
-        fields = "__all__"
+        exclude = ["password", "groups", "user_permissions"]
+
+
+class PublicUserSerializer(serializers.ModelSerializer):
+    """What other users may see: display fields and counters, no relations to load."""
+    class Meta:
+        model = CustomUser
+        fields = [
+            "id",
+            "username",
+            "first_name",
+            "last_name",
+            "bio",
+            "profile_picture",
+            "books_read_count",
+            "reviews_count",
+            "date_joined",
+        ]
+        read_only_fields = fields
 
 class ReadingListSerializer(serializers.ModelSerializer):
     book = serializers.PrimaryKeyRelatedField(queryset=Book.objects.all())
@@ -14,11 +34,15 @@ class ReadingListSerializer(serializers.ModelSerializer):
         model = ReadingList
         fields = "__all__"
         read_only_fields = ['user']
+        # Books of the whole page in one query, rating stats come with the row
+        prefetch_related_fields = {
+            "book": [Prefetch('book', queryset=Book.objects.defer('description'))],
+        }
 
     def to_representation(self, instance):
-        from apps.book.serializer import BookSerializer  # Avoid circular imports
+        from apps.book.serializer import BookSummarySerializer  # Avoid circular imports
         representation = super().to_representation(instance)
-        representation['book'] = BookSerializer(instance.book).data
+        representation['book'] = BookSummarySerializer(instance.book).data
         return representation
 
     def create(self, validated_data):
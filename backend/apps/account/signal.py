@@ -0,0 +1,38 @@
+# account/signals.py
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from main.authentication import forget_cached_user
+from .models import CustomUser, ReadingList
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    forget_cached_user(instance.pk)
+
+@receiver(pre_save, sender=ReadingList)
+def capture_stored_status(sender, instance, raw=False, **kwargs):
+    # An instance built in memory with the pk of a stored row updates it too
+    instance._previous_status = None if raw or instance.pk is None else instance.get_stored_status()
+
+@receiver(post_save, sender=ReadingList)
+def update_books_read_count(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.user_id, instance.status)
+    previous = None if created else instance._previous_status
+    if previous != current:
+        if previous is not None and previous[1] == 'read':
+            CustomUser.adjust_counts(previous[0], books_read=-1)
+        if current[1] == 'read':
+            CustomUser.adjust_counts(current[0], books_read=1)
+    instance.remember_status()
+
+@receiver(post_delete, sender=ReadingList)
+def remove_books_read_count(sender, instance, origin=None, **kwargs):
+    # Entries cascading from a deleted user have no counter left to maintain
+    if isinstance(origin, CustomUser) or (isinstance(origin, QuerySet) and origin.model is CustomUser):
+        return
+    user_id, status = getattr(instance, '_stored_status', None) or (instance.user_id, instance.status)
+    if status == 'read':
+        CustomUser.adjust_counts(user_id, books_read=-1)
@@ -0,0 +1,230 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.book.models import Book
+from apps.review.models import Review
+from main.authentication import get_cached_user
+
+from . import hashing
+from .models import CustomUser, ReadingList
+
+
+class UserCounterTests(TestCase):
+    """The review and reading list signals keep the user counters equal to a recount."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="reader", email="reader@example.com")
+        self.other_user = CustomUser.objects.create(username="other", email="other@example.com")
+        self.books = [Book.objects.create(title=f"Book {i}") for i in range(3)]
+
+    def assertCounts(self, user, books_read, reviews):
+        user.refresh_from_db()
+        self.assertEqual((user.books_read_count, user.reviews_count), (books_read, reviews))
+
+    def assertMatchesRecount(self):
+        output = StringIO()
+        call_command("reconcile_user_counters", stdout=output)
+        self.assertIn(" 0 user(s) corrected", output.getvalue())
+
+    def review(self, book, user=None):
+        return Review.objects.create(user=user or self.user, book=book, title="Review", body="Body", rating=4)
+
+    def test_reviews_count(self):
+        reviews = [self.review(book) for book in self.books]
+        self.assertCounts(self.user, 0, 3)
+
+        reviews[0].rating = 1
+        reviews[0].save()
+        self.assertCounts(self.user, 0, 3)
+
+        reviews[0].delete()
+        self.assertCounts(self.user, 0, 2)
+        Review.objects.filter(user=self.user).delete()
+        self.assertCounts(self.user, 0, 0)
+        self.assertMatchesRecount()
+
+    def test_reviews_count_cascade_from_book(self):
+        self.review(self.books[0])
+        self.review(self.books[1])
+        self.review(self.books[0], user=self.other_user)
+        self.books[0].delete()
+        self.assertCounts(self.user, 0, 1)
+        self.assertCounts(self.other_user, 0, 0)
+        self.assertMatchesRecount()
+
+    def test_books_read_count(self):
+        entry = ReadingList.objects.create(user=self.user, book=self.books[0], status="currently_reading")
+        ReadingList.objects.create(user=self.user, book=self.books[1], status="read")
+        self.assertCounts(self.user, 1, 0)
+
+        entry.status = "read"
+        entry.save()
+        entry.save()
+        self.assertCounts(self.user, 2, 0)
+
+        entry = ReadingList.objects.get(pk=entry.pk)
+        entry.status = "want_to_read"
+        entry.save()
+        self.assertCounts(self.user, 1, 0)
+        self.assertMatchesRecount()
+
+    def test_books_read_count_of_unloaded_instance(self):
+        entry = ReadingList.objects.create(user=self.user, book=self.books[0], status="read")
+        ReadingList(pk=entry.pk, user=self.user, book=self.books[0], status="read", date_added=entry.date_added).save()
+        self.assertCounts(self.user, 1, 0)
+
+    def test_books_read_count_move_to_other_user(self):
+        entry = ReadingList.objects.create(user=self.user, book=self.books[0], status="read")
+        entry.user = self.other_user
+        entry.save()
+        self.assertCounts(self.user, 0, 0)
+        self.assertCounts(self.other_user, 1, 0)
+        self.assertMatchesRecount()
+
+    def test_books_read_count_delete(self):
+        entry = ReadingList.objects.create(user=self.user, book=self.books[0], status="read")
+        ReadingList.objects.create(user=self.user, book=self.books[1], status="read")
+        ReadingList.objects.create(user=self.user, book=self.books[2], status="want_to_read")
+
+        entry.delete()
+        self.assertCounts(self.user, 1, 0)
+        self.books[1].delete()
+        self.assertCounts(self.user, 0, 0)
+        ReadingList.objects.filter(user=self.user).delete()
+        self.assertCounts(self.user, 0, 0)
+        self.assertMatchesRecount()
+
+    def test_user_delete_cascade(self):
+        self.review(self.books[0])
+        ReadingList.objects.create(user=self.user, book=self.books[0], status="read")
+        self.user.delete()
+        self.assertFalse(Review.objects.exists())
+        self.assertFalse(ReadingList.objects.exists())
+        self.assertMatchesRecount()
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AuthenticationTests(TestCase):
+    """Cached user resolution, token revocation and the async login and registration views."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(
+            username="reader", email="reader@example.com", password=make_password("secret-password")
+        )
+
+    def authorize(self, client, user=None):
+        token = str(RefreshToken.for_user(user or self.user).access_token)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return token
+
+    def test_cached_user(self):
+        get_cached_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_user(self.user.pk).username, "reader")
+
+    def test_cached_user_dropped_on_save(self):
+        get_cached_user(self.user.pk)
+        self.user.first_name = "Renamed"
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_cached_user(self.user.pk).first_name, "Renamed")
+
+        self.user.delete()
+        with self.assertRaises(CustomUser.DoesNotExist):
+            get_cached_user(self.user.pk)
+
+    def test_authenticated_request_resolves_user_from_cache(self):
+        client = APIClient()
+        self.authorize(client)
+        client.get("/api/v1/account/users/profile/")
+        # Just the profile lookup, the token and its user come from the caches
+        with self.assertNumQueries(1):
+            response = client.get("/api/v1/account/users/profile/")
+        self.assertEqual(response.data["username"], "reader")
+
+    def test_revoked_token(self):
+        client = APIClient()
+        token = self.authorize(client)
+        self.assertEqual(client.get("/api/v1/account/users/profile/").status_code, 200)
+
+        self.assertEqual(client.post("/api/v1/account/logout/").status_code, 200)
+        self.assertEqual(client.get("/api/v1/account/users/profile/").status_code, 401)
+        response = APIClient().post("/api/v1/account/verify-token/", {"token": token}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+        self.authorize(client)  # a new token still works
+        self.assertEqual(client.get("/api/v1/account/users/profile/").status_code, 200)
+
+    async def test_login(self):
+        response = await AsyncClient().post(
+            "/api/v1/account/authenticate/",
+            {"username": "reader", "password": "secret-password"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["username"], "reader")
+        self.assertIn("token", response.json())
+
+        response = await AsyncClient().post(
+            "/api/v1/account/authenticate/",
+            {"username": "reader", "password": "wrong-password"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_login_rehashes_outdated_password(self):
+        self.user.password = make_password("secret-password", salt="short")  # MD5 wants a longer salt
+        await self.user.asave(update_fields=["password"])
+        response = await AsyncClient().post(
+            "/api/v1/account/authenticate/",
+            {"username": "reader", "password": "secret-password"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        await self.user.arefresh_from_db()
+        self.assertNotIn("$short$", self.user.password)
+        self.assertTrue(self.user.check_password("secret-password"))
+
+    async def test_registration(self):
+        data = {
+            "username": "newreader",
+            "email": "NewReader@Example.com",
+            "first_name": "New",
+            "last_name": "Reader",
+            "password": "another-password",
+        }
+        response = await AsyncClient().post("/api/v1/account/registration/", data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        user = await CustomUser.objects.aget(username="newreader")
+        self.assertEqual(user.email, "NewReader@example.com")
+        self.assertTrue(user.check_password("another-password"))
+
+        response = await AsyncClient().post("/api/v1/account/registration/", data, content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+
+    async def test_hashing_pool_busy(self):
+        pool = hashing.HashingPool(workers=1, queue=0)
+        pool.slots.acquire()  # the only slot is taken
+        with mock.patch.object(hashing, "_pool", pool):
+            response = await AsyncClient().post(
+                "/api/v1/account/authenticate/",
+                {"username": "reader", "password": "secret-password"},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response["Retry-After"], "1")
+            response = await AsyncClient().post(
+                "/api/v1/account/registration/",
+                {"username": "busy", "email": "busy@example.com", "first_name": "B", "last_name": "B", "password": "pw"},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 503)
+        pool.slots.release()
@@ -7,6 +7,7 @@ urlpatterns = [
     path("users/<int:pk>/reviews/", UserView.as_view({"get": "reviews"}), name="user-reviews"),
     path("users/<int:pk>/reading_history/", UserView.as_view({"get": "reading_history"}), name="user-reading-history"),
     path("users/<int:pk>/currently_reading/", UserView.as_view({"get": "currently_reading"}), name="user-currently-reading"),
+    path("users/leaderboard/<str:board>/", UserView.as_view({"get": "leaderboard"}), name="user-leaderboard"),
     path("users/profile/", UserView.as_view({"get": "profile"}), name="user-profile"),
     path(
         "<int:pk>/reading_list",
@@ -1,4 +1,9 @@
-from django.contrib.auth import authenticate
+import json
+
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from main.permissions import IsTokenValidated
@@ -6,6 +11,7 @@ from main.permissions import IsTokenValidated
 from rest_framework.permissions import AllowAny
 from .serializer import (
     CustomUserSerializer,
+    PublicUserSerializer,
     AuthenticationSerializer,
     RegistrationSerializer,
     ReadingListSerializer,
@@ -13,53 +19,73 @@ from .serializer import (
     TokenRefreshSerializer,
 )
 from .models import CustomUser, ReadingList
+from .hashing import HashingPoolBusy, aauthenticate_user, amake_password
+from apps.review.models import Review
 from apps.review.serializer import ReviewSerializer
 from main.utils.generic_api import GenericView
+from main.utils.prefetch import apply_related_lookups, plan_related_lookups
+from django.shortcuts import get_object_or_404
 from rest_framework.decorators import action
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from main.authentication import revoke_token, validate_access_token
 from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
 from rest_framework import status
 
 
 class UserView(GenericView):
     queryset = CustomUser.objects.all()
-    serializer_class = CustomUserSerializer
+    serializer_class = PublicUserSerializer
     size_per_request = 1000
+    default_order_by = "id"  # stable pages, CustomUser has no Meta.ordering
+    allowed_methods = GenericView.allowed_methods + ["leaderboard"]
+    cache_dependencies = ["review.review"]  # reviews_count
+    leaderboards = {
+        "most-active": {"order_by": ["-reviews_count", "-pk"], "filters": {"reviews_count__gt": 0}},
+    }
     @action(detail=True, methods=['get'])
     def profile(self, request, pk=None):
-        """Get user profile"""
-        user = self.get_object()
-        serializer = CustomUserSerializer(user)
-        return Response(serializer.data)
+        """Get user profile, the requesting user's own (with email) without a pk"""
+        user = get_object_or_404(self.queryset, pk=pk or request.user.pk)
+        serializer_class = CustomUserSerializer if user.pk == request.user.pk else PublicUserSerializer
+        return Response(serializer_class(user).data)
 
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
         """Get all reviews for a specific user"""
-        user = self.get_object()
-        reviews = user.reviews.all()  # Assuming you have a related_name='reviews' on your Review model
+        get_object_or_404(CustomUser.objects.only('pk'), pk=pk)
+        select_related, prefetch_related = plan_related_lookups(ReviewSerializer(many=True), Review)
+        reviews = apply_related_lookups(Review.objects.filter(user_id=pk), select_related, prefetch_related)
         serializer = ReviewSerializer(reviews, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def reading_history(self, request, pk=None):
         """Get complete reading history for a user"""
-        user = self.get_object()
-        reading_lists = user.reading_lists.all()
+        reading_lists = self.get_reading_lists(pk)
         serializer = ReadingListSerializer(reading_lists, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def currently_reading(self, request, pk=None):
         """Get books the user is currently reading"""
-        user = self.get_object()
-        current_books = user.reading_lists.filter(status='currently_reading')
+        current_books = self.get_reading_lists(pk).filter(status='currently_reading')
         serializer = ReadingListSerializer(current_books, many=True)
         return Response(serializer.data)
 
+    def get_reading_lists(self, pk):
+        """A user's reading list with the books batch-loaded like ReadingListView does."""
+        get_object_or_404(CustomUser.objects.only('pk'), pk=pk)
+        select_related, prefetch_related = plan_related_lookups(ReadingListSerializer(many=True), ReadingList)
+        return apply_related_lookups(
+            ReadingList.objects.filter(user_id=pk), select_related, prefetch_related
+        )
+
 class ReadingListView(GenericView):
     queryset = ReadingList.objects.all()
     serializer_class = ReadingListSerializer
     size_per_request = 1000
+    default_order_by = "id"  # stable pages, ReadingList has no Meta.ordering
 
     def get_serializer(self, *args, **kwargs):
         # Initialize the serializer with the provided arguments and context
@@ -98,22 +124,44 @@ class ReadingListView(GenericView):
             
         return queryset
 
-class AuthenticationView(APIView):
-    permission_classes = [AllowAny]
-    def post(self, request, format=None):
-        request_serializer = AuthenticationSerializer(data=request.data)
+def parse_request_data(request):
+    """JSON or form body of a plain Django request, like DRF's request.data."""
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+    return request.POST
+
+
+def hashing_busy_response():
+    response = JsonResponse({"error": "Too many sign-in requests, please retry shortly"}, status=503)
+    response["Retry-After"] = "1"
+    return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AuthenticationView(View):
+    """
+    Async so the password check waits on the hashing pool
+    (apps/account/hashing.py) instead of holding a worker; 503 when the
+    pool is saturated.
+    """
+    async def post(self, request, format=None):
+        request_serializer = AuthenticationSerializer(data=parse_request_data(request))
 
         if not request_serializer.is_valid():
-            return Response(request_serializer.errors, status=400)
+            return JsonResponse(request_serializer.errors, status=400)
 
         request_data = request_serializer.data
 
         username = request_data["username"]
         password = request_data["password"]
 
-        print(username, password)
-
-        user = authenticate(username=username, password=password)
+        try:
+            user = await aauthenticate_user(username, password)
+        except HashingPoolBusy:
+            return hashing_busy_response()
 
         if user is not None:
             refresh = RefreshToken.for_user(user)
@@ -121,7 +169,7 @@ class AuthenticationView(APIView):
 
             user_serializer = CustomUserSerializer(user)
 
-            return Response({
+            return JsonResponse({
                 "token": token, 
                 "refresh": str(refresh),
                 "user": user_serializer.data
@@ -129,28 +177,24 @@ class AuthenticationView(APIView):
 
         else:
             print("Failed Authentication")
-            return Response(
+            return JsonResponse(
                 {"error": "Failed Authentication: Incorrect Credentials"}, status=401
             )
 
 
-class RegistrationView(APIView):
-    permission_classes = [AllowAny]
-    def post(self, request, format=None):
-        request_serializer = RegistrationSerializer(data=request.data)
+@method_decorator(csrf_exempt, name="dispatch")
+class RegistrationView(View):
+    """Async like AuthenticationView, the new password is hashed in the hashing pool."""
+    async def post(self, request, format=None):
+        request_serializer = RegistrationSerializer(data=parse_request_data(request))
 
         if not request_serializer.is_valid():
-            return Response(request_serializer.errors, status=400)
+            return JsonResponse(request_serializer.errors, status=400)
 
         request_data = request_serializer.data
-        email = request_data["email"]
+        email = CustomUser.objects.normalize_email(request_data["email"])
 
-        user = None
-
-        try:
-            user = CustomUser.objects.get(email=email)
-        except Exception as e:
-            print("CustomUser Query Error:", e)
+        user = await CustomUser.objects.filter(email=email).afirst()
 
         if user is None:
             username = request_data["username"]
@@ -158,13 +202,20 @@ class RegistrationView(APIView):
             last_name = request_data["last_name"]
             password = request_data["password"]
 
-            user = CustomUser.objects.create_user(
-                username=username,
+            try:
+                hashed_password = await amake_password(password)
+            except HashingPoolBusy:
+                return hashing_busy_response()
+
+            # Same normalization as create_user(), with the hash computed above
+            user = CustomUser(
+                username=CustomUser.normalize_username(username),
                 first_name=first_name,
                 last_name=last_name,
                 email=email,
-                password=password,
+                password=hashed_password,
             )
+            await user.asave()
 
             print(f"Google User {user.username} Successfully Created!")
 
@@ -175,20 +226,29 @@ class RegistrationView(APIView):
             # Serialize user data
             user_serializer = CustomUserSerializer(user)
 
-            return Response({
+            return JsonResponse({
                 "token": token,
                 "refresh": str(refresh),
                 "user": user_serializer.data
             })
         else:
             print(f"User {user.username} Already Exists!")
-            return Response({"error": "User already exists"}, status=409)
+            return JsonResponse({"error": "User already exists"}, status=409)
 
 class LogoutView(APIView):
     permission_classes = [AllowAny]
     def post(self, request, format=None):
-        # In JWT, logout is handled client-side by removing the token
-        # We can add any server-side cleanup here if needed
+        # In JWT, logout is handled client-side by removing the token.
+        # The access token is also revoked so it stops working before it expires
+        auth_header = request.headers.get('Authorization', '')
+        token = request.data.get('token') if isinstance(request.data, dict) else None
+        if not token and ' ' in auth_header:
+            token = auth_header.split(' ')[1]
+        if token:
+            try:
+                revoke_token(token)
+            except TokenError:
+                pass  # invalid or already expired, nothing to revoke
         return Response({"message": "Successfully logged out"})
 
 class TokenVerificationView(APIView):
@@ -202,8 +262,8 @@ class TokenVerificationView(APIView):
         token = serializer.validated_data['token']
         
         try:
-            # Use SimpleJWT for verification
-            access_token = AccessToken(token)
+            # Use SimpleJWT for verification, cached until the token expires
+            access_token = validate_access_token(token)
             # Token is valid if no exception is raised
             return Response({"valid": True, "message": "Token is valid"})
         except ExpiredSignatureError:
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class InvitationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.book'
+
+    def ready(self):
+        from . import signal  # noqa: F401  (connects the receivers)
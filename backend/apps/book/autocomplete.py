@@ -0,0 +1,292 @@
+import heapq
+from itertools import islice
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from main.utils.worker_index import WorkerIndex
+
+MAX_RESULTS = 10
+# Keys per block; every block keeps its own ranked suggestions so a prefix
+# spanning many blocks merges short precomputed lists instead of scanning
+BLOCK_SIZE = 512
+# Suggestions kept per block, extra room for refs found under several keys
+BLOCK_TOP = 2 * MAX_RESULTS
+# Prefixes this short span most blocks, their results are memoized until
+# a key under them changes
+CACHED_PREFIX_LENGTH = 2
+# Titles and names are also found from their next words ("hobbit" finds
+# "The Hobbit"), up to this many word starts per entry
+MAX_WORD_STARTS = 4
+# Rebuild from the database this often to pick up writes handled by other
+# workers and rating changes, which are applied without model signals
+REFRESH_INTERVAL = 10 * 60
+
+TITLE = "title"
+AUTHOR = "author"
+KINDS = (None, TITLE, AUTHOR)
+
+
+def normalize(text):
+    """Case-fold, strip accents and punctuation: "Émile Zola!" -> "emile zola"."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", text.casefold()))
+
+
+def word_starts(text):
+    words = normalize(text).split(" ")
+    return [" ".join(words[i:]) for i in range(min(len(words), MAX_WORD_STARTS)) if words[i]]
+
+
+class _Block:
+    __slots__ = ("keys", "refs", "top")
+
+    def __init__(self, keys, refs):
+        self.keys = keys
+        self.refs = refs
+        self.top = {}
+
+
+class PrefixIndex:
+    """
+    # PrefixIndex
+    Normalized keys kept sorted in fixed-size blocks and searched with
+    bisect. Each key points at a title (one per book) or an author (shared
+    by their books). Suggestions are ranked by popularity: a book's
+    rating_count, summed over an author's books.
+
+    A prefix query ranks the keys of the blocks at both ends of its range
+    and lazily merges the precomputed top lists of the blocks in between,
+    so its cost grows with the number of blocks, not keys.
+    """
+
+    def __init__(self):
+        self.blocks = []  # _Block in key order
+        self.firsts = []  # first key of each block
+        self.suggestions = {}  # ref -> {"text", "weight", "books"}
+        self.books = {}  # book id -> (title, author, weight)
+        self.cached = {}  # (short prefix, kind) -> ranked refs
+        self.lock = threading.RLock()
+
+    @classmethod
+    def build(cls, rows):
+        """Build from (id, title, author, rating_count) rows with a single sort."""
+        index = cls()
+        for book_id, title, author, weight in rows:
+            index.books[book_id] = (title, author, weight)
+            index._add_weight((TITLE, book_id), title, weight)
+            index._add_weight((AUTHOR, normalize(author)), author, weight)
+
+        entries = sorted(
+            (key, ref)
+            for ref, suggestion in index.suggestions.items()
+            for key in word_starts(suggestion["text"])
+        )
+        for start in range(0, len(entries), BLOCK_SIZE):
+            chunk = entries[start : start + BLOCK_SIZE]
+            block = _Block([key for key, _ in chunk], [ref for _, ref in chunk])
+            index._rank_block(block)
+            index.blocks.append(block)
+            index.firsts.append(block.keys[0])
+        return index
+
+    def search(self, prefix, limit=MAX_RESULTS, kind=None):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self.lock:
+            if len(prefix) > CACHED_PREFIX_LENGTH:
+                refs = self._rank(prefix, kind, limit)
+            else:
+                refs = self.cached.get((prefix, kind))
+                if refs is None:
+                    refs = self.cached[(prefix, kind)] = self._rank(prefix, kind, MAX_RESULTS)
+            return [self._describe(ref) for ref in refs[:limit]]
+
+    def upsert_book(self, book_id, title, author, weight):
+        with self.lock:
+            self.remove_book(book_id)
+            self.books[book_id] = (title, author, weight)
+            self._add_weight((TITLE, book_id), title, weight, index_keys=True)
+            self._add_weight((AUTHOR, normalize(author)), author, weight, index_keys=True)
+
+    def remove_book(self, book_id):
+        with self.lock:
+            previous = self.books.pop(book_id, None)
+            if previous is None:
+                return
+            title, author, weight = previous
+            self._remove_weight((TITLE, book_id), weight)
+            self._remove_weight((AUTHOR, normalize(author)), weight)
+
+    # Ranking
+    def _rank(self, prefix, kind, limit):
+        end = prefix + "\U0010ffff"
+        heap = []
+        number = self._block_for(prefix)
+        while number < len(self.blocks) and self.firsts[number] < end:
+            block = self.blocks[number]
+            low = bisect_left(block.keys, prefix)
+            high = bisect_left(block.keys, end, low)
+            if low == 0 and high == len(block.keys):
+                ranked = block.top[kind]
+            else:
+                ranked = self._rank_refs(block.refs[low:high], kind)
+            if ranked:
+                heap.append((ranked[0], number, 0, ranked))
+            number += 1
+
+        heapq.heapify(heap)
+        found, seen = [], set()
+        while heap and len(found) < limit:
+            (_, ref), number, position, ranked = heapq.heappop(heap)
+            if ref not in seen:
+                seen.add(ref)
+                found.append(ref)
+            if position + 1 < len(ranked):
+                heapq.heappush(heap, (ranked[position + 1], number, position + 1, ranked))
+        return found
+
+    def _rank_refs(self, refs, kind):
+        unique = {ref for ref in refs if kind is None or ref[0] == kind}
+        return heapq.nsmallest(BLOCK_TOP, ((self._rank_key(ref), ref) for ref in unique))
+
+    def _rank_block(self, block):
+        ranked = sorted((self._rank_key(ref), ref) for ref in set(block.refs))
+        block.top = {None: ranked[:BLOCK_TOP]}
+        for kind in (TITLE, AUTHOR):
+            block.top[kind] = list(islice((entry for entry in ranked if entry[1][0] == kind), BLOCK_TOP))
+
+    def _rank_key(self, ref):
+        suggestion = self.suggestions[ref]
+        return (-suggestion["weight"], len(suggestion["text"]), suggestion["text"])
+
+    def _describe(self, ref):
+        suggestion = self.suggestions[ref]
+        if ref[0] == TITLE:
+            return {"type": TITLE, "text": suggestion["text"], "book_id": ref[1]}
+        return {"type": AUTHOR, "text": suggestion["text"], "books": suggestion["books"]}
+
+    # Incremental updates
+    def _add_weight(self, ref, text, weight, index_keys=False):
+        suggestion = self.suggestions.get(ref)
+        created = suggestion is None
+        if created:
+            suggestion = self.suggestions[ref] = {"text": text, "weight": 0, "books": 0}
+        suggestion["weight"] += weight or 0
+        suggestion["books"] += 1
+        if index_keys:
+            self._forget_cached(ref)
+            if created:
+                self._insert_keys(ref)
+            else:
+                self._rerank_keys(ref)
+
+    def _remove_weight(self, ref, weight):
+        suggestion = self.suggestions.get(ref)
+        if suggestion is None:
+            return
+        suggestion["weight"] -= weight or 0
+        suggestion["books"] -= 1
+        self._forget_cached(ref)
+        if suggestion["books"] <= 0:
+            self._delete_keys(ref)
+            del self.suggestions[ref]
+        else:
+            self._rerank_keys(ref)
+
+    def _forget_cached(self, ref):
+        for key in word_starts(self.suggestions[ref]["text"]):
+            for length in range(1, CACHED_PREFIX_LENGTH + 1):
+                for kind in KINDS:
+                    self.cached.pop((key[:length], kind), None)
+
+    def _block_for(self, key):
+        """First block that may hold key (equal keys can span blocks)."""
+        return max(bisect_left(self.firsts, key) - 1, 0)
+
+    def _insert_keys(self, ref):
+        for key in word_starts(self.suggestions[ref]["text"]):
+            if not self.blocks:
+                self.blocks.append(_Block([], []))
+                self.firsts.append(key)
+            number = self._block_for(key)
+            block = self.blocks[number]
+            position = bisect_left(block.keys, key)
+            block.keys.insert(position, key)
+            block.refs.insert(position, ref)
+            self.firsts[number] = block.keys[0]
+            if len(block.keys) > 2 * BLOCK_SIZE:
+                tail = _Block(block.keys[BLOCK_SIZE:], block.refs[BLOCK_SIZE:])
+                del block.keys[BLOCK_SIZE:], block.refs[BLOCK_SIZE:]
+                self._rank_block(tail)
+                self.blocks.insert(number + 1, tail)
+                self.firsts.insert(number + 1, tail.keys[0])
+            self._rank_block(block)
+
+    def _delete_keys(self, ref):
+        for number, position in self._locate_keys(ref):
+            block = self.blocks[number]
+            del block.keys[position], block.refs[position]
+            if block.keys:
+                self.firsts[number] = block.keys[0]
+                self._rank_block(block)
+            else:
+                del self.blocks[number], self.firsts[number]
+
+    def _rerank_keys(self, ref):
+        for number in {number for number, _ in self._locate_keys(ref)}:
+            self._rank_block(self.blocks[number])
+
+    def _locate_keys(self, ref):
+        """(block number, position) of every key of ref, last first so deletes stay valid."""
+        found = []
+        for key in word_starts(self.suggestions[ref]["text"]):
+            number = self._block_for(key)
+            while number < len(self.blocks):
+                block = self.blocks[number]
+                position = bisect_left(block.keys, key)
+                while position < len(block.keys) and block.keys[position] == key:
+                    if block.refs[position] == ref:
+                        found.append((number, position))
+                        break
+                    position += 1
+                else:
+                    if position == len(block.keys):
+                        number += 1  # equal keys may continue in the next block
+                        continue
+                break
+        return sorted(found, reverse=True)
+
+
+def load_rows(book_ids=None):
+    from apps.book.models import Book
+
+    books = Book.objects.order_by()
+    if book_ids is not None:
+        books = books.filter(pk__in=book_ids)
+    return books.values_list("id", "title", "author", "rating_count").iterator(chunk_size=5000)
+
+
+def apply_rows(index, book_ids):
+    rows = {row[0]: row for row in load_rows(book_ids)}
+    for book_id in book_ids:
+        if book_id in rows:
+            index.upsert_book(*rows[book_id])
+        else:
+            index.remove_book(book_id)
+
+
+_index = WorkerIndex(lambda: PrefixIndex.build(load_rows()), apply_rows, REFRESH_INTERVAL)
+
+
+def get_index():
+    """The worker's index, caught up with the books written since the last query."""
+    return _index.get()
+
+
+def books_changed(book_ids):
+    """Mark books as saved or deleted."""
+    _index.changed(book_ids)
@@ -0,0 +1,184 @@
+import threading
+
+from main.utils.worker_index import WorkerIndex
+
+# Rebuild from the database this often to pick up writes handled by other
+# workers and QuerySet.update(), which sends no model signals
+REFRESH_INTERVAL = 10 * 60
+# Bits counted at once while skipping to a page of results
+PAGE_CHUNK_BYTES = 512
+
+GENRE = "genre"
+RATING = "rating"
+DECADE = "decade"
+FACETS = (GENRE, RATING, DECADE)
+
+
+def rating_bucket(rating_avg):
+    """Star bucket of an average: 4 covers 4.0 up to 4.99, 5 only a perfect 5.0."""
+    return None if rating_avg is None else max(1, min(5, int(rating_avg)))
+
+
+def decade(publication_date):
+    return None if publication_date is None else publication_date.year // 10 * 10
+
+
+def bitset(book_ids):
+    """Python int with bit `id` set for every id, built through one bytearray."""
+    book_ids = list(book_ids)
+    if not book_ids:
+        return 0
+    data = bytearray((max(book_ids) >> 3) + 1)
+    for book_id in book_ids:
+        data[book_id >> 3] |= 1 << (book_id & 7)
+    return int.from_bytes(data, "little")
+
+
+class FacetIndex:
+    """
+    # FacetIndex
+    One bitset (a Python int, bit = book id) per genre, rating bucket and
+    publication decade. A filter set is an AND over facets of the OR of
+    their selected values, and a facet count is the popcount of that mask
+    AND the value's bitset, so counting costs a few big-int operations per
+    value instead of a GROUP BY over every matching book.
+
+    Counts of a facet ignore the selection on that same facet, so picking
+    a genre still shows how many books the other genres would add.
+    """
+
+    def __init__(self):
+        self.all = 0  # every indexed book
+        self.values = {facet: {} for facet in FACETS}  # facet -> value -> bitset
+        self.unfiltered = None  # facet counts without a selection, until the next write
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, rows, genre_rows):
+        """Build from (id, rating_avg, publication_date) and (book_id, genre_id) rows."""
+        index = cls()
+        index._add(rows, genre_rows)
+        return index
+
+    def apply(self, book_ids, rows, genre_rows):
+        """Replace the entries of `book_ids` with their current rows (none when deleted)."""
+        dirty = ~bitset(book_ids)
+        with self.lock:
+            self.unfiltered = None
+            self.all &= dirty
+            for values in self.values.values():
+                for value, bits in list(values.items()):
+                    if bits & dirty:
+                        values[value] = bits & dirty
+                    else:
+                        del values[value]  # e.g. a deleted genre
+            self._add(rows, genre_rows)
+
+    def count(self, selection):
+        """Number of books matching `selection`, {facet: [values]}."""
+        return self.match(selection).bit_count()
+
+    def match(self, selection, skip=None):
+        mask = self.all
+        for facet, values in selection.items():
+            if facet != skip and values:
+                bits = self.values[facet]
+                selected = 0
+                for value in values:
+                    selected |= bits.get(value, 0)
+                mask &= selected
+        return mask
+
+    def facet_counts(self, selection):
+        """{facet: {value: count}} of the values with at least one matching book."""
+        if not any(selection.values()):
+            if self.unfiltered is None:
+                self.unfiltered = self._count_values(selection)
+            return self.unfiltered
+        return self._count_values(selection)
+
+    def _count_values(self, selection):
+        counts = {}
+        for facet in FACETS:
+            mask = self.match(selection, skip=facet)
+            counts[facet] = {
+                value: count
+                for value, bits in self.values[facet].items()
+                if (count := (mask & bits).bit_count())
+            }
+        return counts
+
+    def page(self, mask, offset, limit):
+        """Ids of the matching books, highest (newest) first, from `offset`."""
+        data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+        ids = []
+        end = len(data)
+        while end > 0 and len(ids) < limit:
+            start = max(0, end - PAGE_CHUNK_BYTES)
+            chunk = int.from_bytes(data[start:end], "little")
+            found = chunk.bit_count()
+            if found <= offset:
+                offset -= found  # skip whole chunks without looking at their bits
+            else:
+                while chunk and len(ids) < limit:
+                    bit = chunk.bit_length() - 1
+                    chunk ^= 1 << bit
+                    if offset:
+                        offset -= 1
+                    else:
+                        ids.append(start * 8 + bit)
+            end = start
+        return ids
+
+    def _add(self, rows, genre_rows):
+        grouped = {facet: {} for facet in FACETS}
+        book_ids = []
+        for book_id, rating_avg, publication_date in rows:
+            book_ids.append(book_id)
+            for facet, value in ((RATING, rating_bucket(rating_avg)), (DECADE, decade(publication_date))):
+                if value is not None:
+                    grouped[facet].setdefault(value, []).append(book_id)
+        for book_id, genre_id in genre_rows:
+            grouped[GENRE].setdefault(genre_id, []).append(book_id)
+
+        self.all |= bitset(book_ids)
+        for facet, values in grouped.items():
+            bits = self.values[facet]
+            for value, ids in values.items():
+                bits[value] = bits.get(value, 0) | bitset(ids)
+
+
+def load_rows(book_ids=None):
+    from apps.book.models import Book
+
+    books = Book.objects.order_by()
+    genres = Book.genres.through.objects.order_by()
+    if book_ids is not None:
+        books = books.filter(pk__in=book_ids)
+        genres = genres.filter(book_id__in=book_ids)
+    return (
+        books.values_list("id", "rating_avg", "publication_date").iterator(chunk_size=5000),
+        genres.values_list("book_id", "genre_id").iterator(chunk_size=5000),
+    )
+
+
+def apply_rows(index, book_ids):
+    index.apply(book_ids, *load_rows(book_ids))
+
+
+_index = WorkerIndex(lambda: FacetIndex.build(*load_rows()), apply_rows, REFRESH_INTERVAL)
+
+
+def get_index():
+    """The worker's index, caught up with the books written since the last query."""
+    return _index.get()
+
+
+def is_active():
+    """Whether this worker keeps an index, so writes need to be recorded."""
+    return _index.active
+
+
+def books_changed(book_ids):
+    """Mark books as written: saved, deleted, re-rated or re-genred."""
+    _index.changed(book_ids)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.book import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text book search index from the book table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-optimize", action="store_true", help="Skip merging the index b-trees.")
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError("The search index is only available on SQLite.")
+        search.rebuild_index(optimize=not options["no_optimize"])
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
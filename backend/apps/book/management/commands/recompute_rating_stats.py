@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from apps.book.models import Book, RATINGS, RATING_STATS_FIELDS, weighted_rating
+from apps.review.models import Review
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized rating statistics of books from their reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--book", type=int, nargs="*", help="Only recompute these book ids.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        books = Book.objects.only("pk", *RATING_STATS_FIELDS).order_by("pk")
+        reviews = Review.objects.all()
+        if options["book"]:
+            books = books.filter(pk__in=options["book"])
+            reviews = reviews.filter(book_id__in=options["book"])
+
+        # One grouped query for every book's totals and histogram
+        stats = {
+            row.pop("book_id"): row
+            for row in reviews.order_by().values("book_id").annotate(
+                rating_count=Count("id"),
+                rating_sum=Sum("rating"),
+                **{
+                    f"rating_{rating}_count": Count("id", filter=Q(rating=rating))
+                    for rating in RATINGS
+                },
+            )
+        }
+
+        empty = {name: 0 for name in RATING_STATS_FIELDS}
+        changed = []
+        for book in books.iterator(chunk_size=options["batch_size"]):
+            expected = dict(empty, **stats.get(book.pk, {}))
+            count = expected["rating_count"]
+            expected["rating_avg"] = expected["rating_sum"] / count if count else None
+            expected["rating_weighted"] = weighted_rating(expected["rating_sum"], count)
+            if any(getattr(book, name) != value for name, value in expected.items()):
+                for name, value in expected.items():
+                    setattr(book, name, value)
+                changed.append(book)
+
+        with transaction.atomic():
+            Book.objects.bulk_update(changed, RATING_STATS_FIELDS, batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed rating statistics, {len(changed)} book(s) corrected."))
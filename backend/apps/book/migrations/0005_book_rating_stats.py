@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-18 18:01
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_stats(apps, schema_editor):
+    Book = apps.get_model('book', 'Book')
+    Review = apps.get_model('review', 'Review')
+    rows = Review.objects.order_by().values('book_id').annotate(
+        rating_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{rating}_count': Count('id', filter=Q(rating=rating)) for rating in range(1, 6)},
+    )
+    for row in rows:
+        book_id = row.pop('book_id')
+        row['rating_avg'] = row['rating_sum'] / row['rating_count']
+        Book.objects.filter(pk=book_id).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0004_alter_book_cover_image'),
+        ('review', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_avg',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations
+
+# External-content FTS5 index over book_book, kept in sync by triggers so
+# bulk writes and QuerySet.update() are covered too. The update trigger only
+# fires for the indexed columns, not for the rating counters.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE book_book_fts USING fts5(
+        title, author, description, isbn,
+        content='book_book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    "INSERT INTO book_book_fts(book_book_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0, 8.0)')",
+    """
+    CREATE TRIGGER book_book_fts_insert AFTER INSERT ON book_book BEGIN
+        INSERT INTO book_book_fts(rowid, title, author, description, isbn)
+        VALUES (new.id, new.title, new.author, new.description, new.isbn);
+    END
+    """,
+    """
+    CREATE TRIGGER book_book_fts_delete AFTER DELETE ON book_book BEGIN
+        INSERT INTO book_book_fts(book_book_fts, rowid, title, author, description, isbn)
+        VALUES ('delete', old.id, old.title, old.author, old.description, old.isbn);
+    END
+    """,
+    """
+    CREATE TRIGGER book_book_fts_update AFTER UPDATE OF title, author, description, isbn ON book_book BEGIN
+        INSERT INTO book_book_fts(book_book_fts, rowid, title, author, description, isbn)
+        VALUES ('delete', old.id, old.title, old.author, old.description, old.isbn);
+        INSERT INTO book_book_fts(rowid, title, author, description, isbn)
+        VALUES (new.id, new.title, new.author, new.description, new.isbn);
+    END
+    """,
+    "INSERT INTO book_book_fts(book_book_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS book_book_fts_insert",
+    "DROP TRIGGER IF EXISTS book_book_fts_delete",
+    "DROP TRIGGER IF EXISTS book_book_fts_update",
+    "DROP TABLE IF EXISTS book_book_fts",
+]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        # Other databases search with the icontains fallback (apps/book/search.py)
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0005_book_rating_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
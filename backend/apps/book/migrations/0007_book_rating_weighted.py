@@ -0,0 +1,72 @@
+# Generated by Django 5.2 on 2026-10-18 18:25
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+# SQLite rebuilds book_book for the AlterField below, which drops the
+# search index triggers of 0006. The rows keep their ids, so the index
+# itself stays valid and only the triggers need to be created again.
+TRIGGER_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS book_book_fts_insert AFTER INSERT ON book_book BEGIN
+        INSERT INTO book_book_fts(rowid, title, author, description, isbn)
+        VALUES (new.id, new.title, new.author, new.description, new.isbn);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_book_fts_delete AFTER DELETE ON book_book BEGIN
+        INSERT INTO book_book_fts(book_book_fts, rowid, title, author, description, isbn)
+        VALUES ('delete', old.id, old.title, old.author, old.description, old.isbn);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_book_fts_update
+    AFTER UPDATE OF title, author, description, isbn ON book_book BEGIN
+        INSERT INTO book_book_fts(book_book_fts, rowid, title, author, description, isbn)
+        VALUES ('delete', old.id, old.title, old.author, old.description, old.isbn);
+        INSERT INTO book_book_fts(rowid, title, author, description, isbn)
+        VALUES (new.id, new.title, new.author, new.description, new.isbn);
+    END
+    """,
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    # Other databases have no FTS5 index (apps/book/search.py)
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TRIGGER_SQL:
+        schema_editor.execute(statement)
+
+
+def backfill_rating_weighted(apps, schema_editor):
+    # Same prior as apps.book.models.weighted_rating (5 reviews at 3.0)
+    Book = apps.get_model('book', 'Book')
+    Book.objects.filter(rating_count__gt=0).update(
+        rating_weighted=(F('rating_sum') + 5 * 3.0) / (F('rating_count') + 5.0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0006_book_search_index'),
+    ]
+
+    operations = [
+        # Unapplying the AlterField rebuilds the table again, this runs last then
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='book',
+            name='rating_weighted',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_rating_weighted, migrations.RunPython.noop),
+    ]
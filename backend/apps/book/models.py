@@ -1,7 +1,9 @@
 # books/models.py
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Avg
+from django.db.models import Avg, Case, Count, F, Q, Sum, When
+from django.db.models.functions import Cast, NullIf
+from django.db.models.lookups import GreaterThan
 from django.db.models.signals import post_migrate  # Add this import
 from django.dispatch import receiver
 from rest_framework import status
@@ -14,6 +16,28 @@ DEFAULT_GENRES = [
     "Historical Fiction",
 ]
 
+RATINGS = range(1, 6)
+
+# Bayesian prior of rating_weighted: every book starts with this many
+# virtual reviews at this rating, so a single 5-star review can't top the chart
+RATING_PRIOR_COUNT = 5
+RATING_PRIOR_MEAN = 3.0
+
+RATING_STATS_FIELDS = [
+    "rating_count",
+    "rating_sum",
+    "rating_avg",
+    "rating_weighted",
+    *(f"rating_{rating}_count" for rating in RATINGS),
+]
+
+
+def weighted_rating(rating_sum, rating_count):
+    if not rating_count:
+        return None
+    return (rating_sum + RATING_PRIOR_COUNT * RATING_PRIOR_MEAN) / (rating_count + RATING_PRIOR_COUNT)
+
+
 class Genre(models.Model):
     """Model for book genres"""
     name = models.CharField(max_length=100, unique=True)
@@ -58,6 +82,18 @@ class Book(models.Model):
     created_by = models.ForeignKey("account.CustomUser", on_delete=models.SET_NULL, null=True, related_name='added_books')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Rating statistics, maintained by the review signals (apps/review/signal.py)
+    # and repaired with `manage.py recompute_rating_stats`
+    rating_count = models.PositiveIntegerField(default=0, db_index=True)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(null=True, blank=True, db_index=True)
+    rating_weighted = models.FloatField(null=True, blank=True, db_index=True)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         verbose_name = _("Book")
@@ -66,3 +102,44 @@ class Book(models.Model):
         
     def __str__(self):
         return self.title
+
+    @property
+    def rating_histogram(self):
+        return {rating: getattr(self, f"rating_{rating}_count") for rating in RATINGS}
+
+    @classmethod
+    def adjust_rating_stats(cls, book_id, rating, delta):
+        """Add (delta=1) or remove (delta=-1) one rating with a single atomic UPDATE."""
+        count = F("rating_count") + delta
+        total = F("rating_sum") + delta * rating
+        cls.objects.filter(pk=book_id).update(
+            rating_count=count,
+            rating_sum=total,
+            # SET expressions read the pre-update row, so the average uses the new totals
+            rating_avg=Cast(total, models.FloatField()) / NullIf(count, 0),
+            rating_weighted=Case(
+                When(
+                    GreaterThan(count, 0),
+                    then=(Cast(total, models.FloatField()) + RATING_PRIOR_COUNT * RATING_PRIOR_MEAN)
+                    / (count + RATING_PRIOR_COUNT),
+                ),
+                default=None,
+            ),
+            **{f"rating_{rating}_count": F(f"rating_{rating}_count") + delta},
+        )
+
+    def update_rating_stats(self):
+        """Recompute the rating statistics from the book's reviews."""
+        stats = self.reviews.aggregate(
+            rating_count=Count("id"),
+            rating_sum=Sum("rating", default=0),
+            **{
+                f"rating_{rating}_count": Count("id", filter=Q(rating=rating))
+                for rating in RATINGS
+            },
+        )
+        for name, value in stats.items():
+            setattr(self, name, value)
+        self.rating_avg = self.rating_sum / self.rating_count if self.rating_count else None
+        self.rating_weighted = weighted_rating(self.rating_sum, self.rating_count)
+        self.save(update_fields=RATING_STATS_FIELDS)
@@ -0,0 +1,96 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+SEARCH_TABLE = "book_book_fts"
+SEARCH_COLUMNS = ["title", "author", "description", "isbn"]
+# bm25() column weights, in SEARCH_COLUMNS order
+SEARCH_WEIGHTS = [10.0, 5.0, 1.0, 8.0]
+
+MARKS = ("<mark>", "</mark>")
+SNIPPET_TOKENS = 16
+
+
+def is_supported():
+    """The FTS5 index only exists on SQLite, other databases use the fallback."""
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 query matching every word. Words are
+    quoted, so operators in user input are literal.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search_books(text, offset, limit):
+    """
+    Return [(book_id, score, highlights)] for one page of matches, best
+    first. highlights holds the marked-up title, author and a description snippet.
+    """
+    if is_supported():
+        return _search_fts(text, offset, limit)
+    return _search_fallback(text, offset, limit)
+
+
+def _search_fts(text, offset, limit):
+    match = build_match_query(text)
+    if match is None:
+        return []
+    with connection.cursor() as cursor:
+        # Rank first and mark up only the page, highlight() and snippet()
+        # would otherwise run for every match before the sort. ORDER BY rank
+        # with a LIMIT on the MATCH itself lets FTS5 keep only the top
+        # offset + limit matches while it scores all of them.
+        cursor.execute(
+            f"SELECT rowid, rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY rank LIMIT %s OFFSET %s",
+            [match, limit, offset],
+        )
+        ranked = cursor.fetchall()
+        if not ranked:
+            return []
+
+        ids = [book_id for book_id, _ in ranked]
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(
+            f"SELECT rowid, "
+            f"highlight({SEARCH_TABLE}, 0, %s, %s), "
+            f"highlight({SEARCH_TABLE}, 1, %s, %s), "
+            f"snippet({SEARCH_TABLE}, 2, %s, %s, '…', %s) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid IN ({placeholders})",
+            [*MARKS, *MARKS, *MARKS, SNIPPET_TOKENS, match, *ids],
+        )
+        highlights = {
+            book_id: {"title": title, "author": author, "snippet": snippet or None}
+            for book_id, title, author, snippet in cursor.fetchall()
+        }
+
+    # bm25 is lower-is-better, scores are reported higher-is-better
+    return [(book_id, round(-rank, 4), highlights.get(book_id, {})) for book_id, rank in ranked]
+
+
+def _search_fallback(text, offset, limit):
+    from apps.book.models import Book
+
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return []
+    condition = Q()
+    for word in words:
+        condition &= Q(*[Q(**{f"{column}__icontains": word}) for column in SEARCH_COLUMNS], _connector=Q.OR)
+    ids = Book.objects.filter(condition).order_by("title", "pk").values_list("pk", flat=True)
+    return [(book_id, None, {}) for book_id in ids[offset : offset + limit]]
+
+
+def rebuild_index(optimize=True):
+    """Repopulate the index from book_book, then merge its b-trees."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
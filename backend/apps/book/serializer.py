@@ -1,7 +1,11 @@
 from .models import Book, Genre, Author
-from apps.review.serializer import ReviewSerializer
+from apps.review.models import Review
+from apps.review.serializer import ReviewPreviewSerializer, get_review_page
+from django.db.models import Prefetch
 from rest_framework import serializers
-from apps.account.serializer import CustomUserSerializer
+from apps.account.serializer import PublicUserSerializer
+
+REVIEW_PREVIEW_SIZE = 3
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -12,17 +16,19 @@ class GenreSerializer(serializers.ModelSerializer):
 
 class BookSerializer(serializers.ModelSerializer):
     cover_image = serializers.URLField(required=False, allow_blank=True, allow_null=True)
-    reviews = ReviewSerializer(many=True, read_only=True) 
-     # Include reviews
+    # First page of reviews; the rest via /book/<pk>/reviews/?cursor=<reviews_next_cursor>
+    reviews = serializers.SerializerMethodField()
+    reviews_next_cursor = serializers.SerializerMethodField()
     genres = serializers.PrimaryKeyRelatedField(
         many=True,
         queryset=Genre.objects.all(),
         write_only=True
     )
-    created_by = CustomUserSerializer(read_only=True)
+    created_by = PublicUserSerializer(read_only=True)
     genres_detail = GenreSerializer(source='genres', many=True, read_only=True)
-    average_rating = serializers.FloatField(read_only=True)  # Include average_rating
-    total_reviews = serializers.IntegerField(read_only=True)  # Include total_reviews
+    average_rating = serializers.FloatField(source='rating_avg', read_only=True)
+    total_reviews = serializers.IntegerField(source='rating_count', read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
 
     class Meta:
         model = Book
@@ -40,11 +46,26 @@ class BookSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "reviews",
+            "reviews_next_cursor",
             "average_rating",
             "total_reviews",
+            "rating_histogram",
         ]
         read_only_fields = ["created_at", "created_by"]
 
+    def get_review_page(self, obj):
+        if getattr(obj, "_review_page", None) is None:
+            obj._review_page = get_review_page(obj.pk)
+        return obj._review_page
+
+    def get_reviews(self, obj):
+        rows, _, _ = self.get_review_page(obj)
+        return ReviewPreviewSerializer(rows, many=True).data
+
+    def get_reviews_next_cursor(self, obj):
+        _, next_cursor, _ = self.get_review_page(obj)
+        return next_cursor
+
     def create(self, validated_data):
         try:
             # Get the logged-in user from the context
@@ -66,6 +87,72 @@ class BookSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"An error occurred while creating the book: {str(e)}")
 
 
+class BookListSerializer(serializers.ModelSerializer):
+    """
+    Compact book for lists: scalar fields, genres, rating stats and the
+    latest reviews, instead of every review with its user and comments.
+    """
+    genres_detail = GenreSerializer(source='genres', many=True, read_only=True)
+    average_rating = serializers.FloatField(source='rating_avg', read_only=True)
+    total_reviews = serializers.IntegerField(source='rating_count', read_only=True)
+    weighted_rating = serializers.FloatField(source='rating_weighted', read_only=True)
+    review_preview = ReviewPreviewSerializer(source='preview_reviews', many=True, read_only=True)
+
+    class Meta:
+        model = Book
+        fields = [
+            "id",
+            "title",
+            "author",
+            "genres_detail",
+            "description",
+            "cover_image",
+            "isbn",
+            "publication_date",
+            "created_at",
+            "updated_at",
+            "average_rating",
+            "total_reviews",
+            "weighted_rating",
+            "review_preview",
+        ]
+        read_only_fields = fields
+        # Latest reviews per book in one windowed query
+        prefetch_related_fields = {
+            "review_preview": [
+                Prefetch(
+                    'reviews',
+                    queryset=Review.objects.select_related('user')
+                    .only('id', 'book_id', 'user_id', 'user__username', 'rating', 'title', 'body', 'comment_count', 'created_at')
+                    .order_by('-created_at', '-pk')[:REVIEW_PREVIEW_SIZE],
+                    to_attr='preview_reviews',
+                ),
+            ],
+        }
+
+
+class BookSummarySerializer(serializers.ModelSerializer):
+    """Smallest book representation, embedded in reading lists: no relations, stats from the row."""
+    average_rating = serializers.FloatField(source='rating_avg', read_only=True)
+    total_reviews = serializers.IntegerField(source='rating_count', read_only=True)
+    weighted_rating = serializers.FloatField(source='rating_weighted', read_only=True)
+
+    class Meta:
+        model = Book
+        fields = [
+            "id",
+            "title",
+            "author",
+            "cover_image",
+            "isbn",
+            "publication_date",
+            "average_rating",
+            "total_reviews",
+            "weighted_rating",
+        ]
+        read_only_fields = fields
+
+
 class AuthorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Author
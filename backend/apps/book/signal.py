@@ -0,0 +1,43 @@
+# books/signals.py
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from . import autocomplete, facets
+from .models import Book, Genre
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def update_autocomplete(sender, instance, raw=False, **kwargs):
+    if not raw:
+        autocomplete.books_changed([instance.pk])
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def update_facets(sender, instance, raw=False, **kwargs):
+    if not raw:
+        facets.books_changed([instance.pk])
+
+@receiver(m2m_changed, sender=Book.genres.through)
+def update_genre_facets(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            facets.books_changed([instance.pk])
+    elif action == "pre_clear":
+        # genre.books.clear() reports no pk_set, read the books it unlinks
+        instance._cleared_book_ids = _genre_book_ids(instance)
+    elif action == "post_clear":
+        facets.books_changed(instance._cleared_book_ids)
+    elif action in ("post_add", "post_remove"):
+        facets.books_changed(pk_set)
+
+@receiver(pre_delete, sender=Genre)
+def capture_genre_books(sender, instance, **kwargs):
+    instance._deleted_book_ids = _genre_book_ids(instance)
+
+@receiver(post_delete, sender=Genre)
+def remove_genre_facet(sender, instance, **kwargs):
+    facets.books_changed(instance._deleted_book_ids)
+
+def _genre_book_ids(genre):
+    if not facets.is_active():
+        return []
+    return list(Book.genres.through.objects.filter(genre_id=genre.pk).values_list("book_id", flat=True))
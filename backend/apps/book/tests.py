@@ -1,3 +1,386 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import AsyncClient, TestCase
+from rest_framework.test import APIClient
+
+from apps.account.models import CustomUser
+from apps.review.models import Comment, Review
+from main.utils.caching import get_generations, get_or_compute, invalidate_namespace, set_cached, stable_digest
+from main.utils.metrics import assert_max_queries
+
+from . import search
+from .models import Book, Genre
+
+
+class BookQueryBudgetTests(TestCase):
+    """Book endpoints render a full page in a constant number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create(username=f"reader{i}", email=f"reader{i}@example.com")
+            for i in range(3)
+        ]
+        genres = [Genre.objects.create(name=f"Genre {i}") for i in range(3)]
+        cls.books = []
+        for i in range(25):
+            book = Book.objects.create(title=f"Book {i:02d}", author=f"Author {i % 4}", created_by=cls.users[0])
+            book.genres.set(genres[: i % 3 + 1])
+            for user in cls.users:
+                review = Review.objects.create(user=user, book=book, title="Review", body="Body", rating=i % 5 + 1)
+                Comment.objects.create(user=cls.users[0], review=review, body="Comment")
+            cls.books.append(book)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def test_list(self):
+        with assert_max_queries(4, "BookView.list"):
+            response = self.client.get("/api/v1/book/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["objects"]), 20)
+
+    def test_list_ordered_by_rating(self):
+        with assert_max_queries(4, "BookView.list"):
+            response = self.client.get("/api/v1/book/", {"order_by": "-rating_weighted", "page": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["objects"]), 5)
+
+    def test_cached_list(self):
+        self.client.get("/api/v1/book/")
+        with assert_max_queries(0, "cached BookView.list"):
+            response = self.client.get("/api/v1/book/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_modified_list(self):
+        etag = self.client.get("/api/v1/book/")["ETag"]
+        with assert_max_queries(0, "conditional BookView.list"):
+            response = self.client.get("/api/v1/book/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_retrieve(self):
+        with assert_max_queries(4, "BookView.retrieve"):
+            response = self.client.get(f"/api/v1/book/{self.books[0].pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["reviews"]), 3)
+
+    async def test_metrics_under_asgi(self):
+        response = await AsyncClient().get("/api/v1/book/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('desc="0 queries"', response["Server-Timing"])
+
+
+class BookBulkTests(TestCase):
+    """Bulk writes need a signed-in user and report each rejected item by index."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username="editor", email="editor@example.com")
+        self.genre = Genre.objects.create(name="Bulk genre")
+        self.books = [Book.objects.create(title=f"Book {i}", created_by=self.user) for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_requires_authentication(self):
+        client = APIClient()
+        response = client.post("/api/v1/book/bulk/", [{"title": "New", "genres": [self.genre.pk]}], format="json")
+        self.assertEqual(response.status_code, 401)
+        response = client.delete("/api/v1/book/bulk/", QUERY_STRING=f"ids={self.books[0].pk}")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(Book.objects.count(), 3)
+
+    def test_create_partial_failure(self):
+        items = [{"title": "New", "genres": [self.genre.pk]}, {"genres": [self.genre.pk]}]
+        response = self.client.post("/api/v1/book/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data["created"]), 1)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1])
+        self.assertEqual(Book.objects.get(pk=response.data["created"][0]).created_by, self.user)
+
+    def test_update_partial_failure(self):
+        items = [
+            {"id": "abc", "title": "Invalid id"},
+            {"id": self.books[0].pk, "title": "Renamed"},
+            {"id": 10**6, "title": "Missing"},
+            {"id": 2**70, "title": "Out of range"},
+        ]
+        response = self.client.patch("/api/v1/book/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data["updated"], [self.books[0].pk])
+        self.assertEqual([error["index"] for error in response.data["errors"]], [0, 2, 3])
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].title, "Renamed")
+
+    def test_delete_partial_failure(self):
+        ids = f"abc,{self.books[0].pk},{10**6}"
+        response = self.client.delete("/api/v1/book/bulk/", QUERY_STRING=f"ids={ids}")
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data["deleted"], [self.books[0].pk])
+        self.assertEqual(response.data["not_found"], [str(10**6)])
+        self.assertEqual([error["index"] for error in response.data["errors"]], [0])
+        self.assertEqual(Book.objects.count(), 2)
+
+
+class CachingTests(TestCase):
+    """Generation counters, cache keys and single-flight reads of main.utils.caching."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generation_bumped_on_commit(self):
+        before = get_generations(["test.model", "test.model:all"])
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_namespace("test.model")
+            self.assertEqual(get_generations(["test.model", "test.model:all"]), before)
+        self.assertEqual(get_generations(["test.model", "test.model:all"]), [before[0] + 1, before[1]])
+
+    def test_generation_kept_on_rollback(self):
+        before = get_generations(["test.model"])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(IntegrityError):
+                with transaction.atomic():
+                    invalidate_namespace("test.model")
+                    raise IntegrityError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_generations(["test.model"]), before)
+
+    def test_tagged_generations(self):
+        namespaces = ["test.model", "test.model:all", "test.model:book:1", "test.model:book:2"]
+        before = get_generations(namespaces)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_namespace("test.model", ["book:1"])
+        self.assertEqual(get_generations(namespaces), [before[0], before[1] + 1, before[2] + 1, before[3]])
+
+    def test_stable_digest(self):
+        self.assertEqual(
+            stable_digest({"filters": {"genre": 1, "author": "Tolkien"}, "fields": {"title", "id"}}),
+            stable_digest({"fields": {"id", "title"}, "filters": {"author": "Tolkien", "genre": 1}}),
+        )
+        self.assertNotEqual(stable_digest({"page": 1}), stable_digest({"page": "1"}))
+        # Identical in every process, whatever PYTHONHASHSEED
+        self.assertEqual(stable_digest({"page": 1}, ["a", "b"]), "7bdd87261696c07548c8c805f050413f")
+
+    def test_get_or_compute(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(get_or_compute("key", compute, 60), 1)
+        self.assertEqual(get_or_compute("key", compute, 60), 1)
+        self.assertEqual(len(calls), 1)
+
+    def test_single_flight(self):
+        calls, results = [], []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "fresh"
+
+        def read():
+            results.append(get_or_compute("key", compute, 60))
+
+        threads = [threading.Thread(target=read) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["fresh"] * 5)
+
+    def test_stale_while_revalidate(self):
+        set_cached("key", "stale", timeout=0, stale_timeout=60)
+
+        cache.add("key_lock", 1)  # another request is recomputing
+        self.assertEqual(get_or_compute("key", lambda: "fresh", 60, 60), "stale")
+
+        cache.delete("key_lock")
+        self.assertEqual(get_or_compute("key", lambda: "fresh", 60, 60), "fresh")
+        self.assertEqual(get_or_compute("key", lambda: "newer", 60, 60), "fresh")
+
+    def test_lock_holder_too_slow(self):
+        cache.add("key_lock", 1)
+        self.assertEqual(get_or_compute("key", lambda: "fresh", 60, wait_timeout=0.1), "fresh")
+        self.assertIsNone(cache.get("key"))  # left for the lock holder to publish
+
+
+class BookListCacheTests(TestCase):
+    """Field selection, conditional GETs and count policies of the cached book lists."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username="editor", email="editor@example.com")
+        genre = Genre.objects.create(name="Cached genre")
+        cls.books = []
+        for i in range(25):
+            book = Book.objects.create(title=f"Book {i:02d}", author="Author", created_by=cls.user)
+            book.genres.add(genre)
+            cls.books.append(book)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def rename(self, book, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch("/api/v1/book/bulk/", [{"id": book.pk, "title": title}], format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_fields_and_omit(self):
+        response = self.client.get("/api/v1/book/", {"fields": "id,title"})
+        self.assertEqual(set(response.data["objects"][0]), {"id", "title"})
+        response = self.client.get("/api/v1/book/", {"omit": "review_preview,description"})
+        self.assertFalse({"review_preview", "description"} & set(response.data["objects"][0]))
+        response = self.client.get(f"/api/v1/book/{self.books[0].pk}/", {"fields": "id,title"})
+        self.assertEqual(response.data, {"id": self.books[0].pk, "title": "Book 00"})
+        self.assertEqual(self.client.get("/api/v1/book/", {"fields": "id,unknown"}).status_code, 400)
+
+    def test_fields_in_any_order_share_a_cache_entry(self):
+        self.client.get("/api/v1/book/", {"fields": "title,id,title"})
+        with assert_max_queries(0, "cached BookView.list ?fields="):
+            response = self.client.get("/api/v1/book/", {"fields": "id,title"})
+        self.assertEqual(len(response.data["objects"]), 20)
+
+    def test_field_selection_skips_related_queries(self):
+        # The page and the count, no reviews or genres
+        with assert_max_queries(2, "BookView.list ?fields=id,title"):
+            self.client.get("/api/v1/book/", {"fields": "id,title"})
+        cache.clear()
+        with assert_max_queries(3, "BookView.list ?fields=id,genres_detail"):
+            response = self.client.get("/api/v1/book/", {"fields": "id,genres_detail"})
+        self.assertEqual(response.data["objects"][0]["genres_detail"][0]["name"], "Cached genre")
+
+    def test_list_etag_changes_on_write(self):
+        params = {"order_by": "id"}
+        etag = self.client.get("/api/v1/book/", params)["ETag"]
+        self.assertEqual(self.client.get("/api/v1/book/", params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get("/api/v1/book/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.rename(self.books[0], "Renamed")
+        response = self.client.get("/api/v1/book/", params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["objects"][0]["title"], "Renamed")
+
+    def test_object_etag_changes_on_write(self):
+        url = f"/api/v1/book/{self.books[0].pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {"fields": "id"}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        time.sleep(0.01)  # updated_at has to move
+        self.rename(self.books[0], "Renamed")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_cached_count(self):
+        response = self.client.get("/api/v1/book/")
+        self.assertEqual(
+            (response.data["count_policy"], response.data["total_count"], response.data["num_pages"]),
+            ("cached", 25, 2),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/v1/book/bulk/", [{"title": "New", "genres": []}], format="json")
+        self.assertEqual(self.client.get("/api/v1/book/").data["total_count"], 26)
+
+    def test_count_policy_requested(self):
+        response = self.client.get("/api/v1/book/", {"count": "none"})
+        self.assertEqual(
+            (response.data["count_policy"], response.data["total_count"], response.data["has_next"]),
+            ("none", None, True),
+        )
+        # A request may lower the view's policy but never raise it
+        self.assertEqual(self.client.get("/api/v1/book/", {"count": "exact"}).data["count_policy"], "cached")
+        response = self.client.get("/api/v1/book/", {"count": "estimated", "page": 2})
+        self.assertEqual((response.data["total_count"], response.data["has_next"]), (25, False))
+
+    def test_exact_count(self):
+        for book in self.books[:3]:
+            Review.objects.create(user=self.user, book=book, title="Review", body="Body", rating=3)
+        response = self.client.get("/api/v1/review/reviews/")
+        self.assertEqual((response.data["count_policy"], response.data["total_count"]), ("exact", 3))
+
+    def test_invalid_page(self):
+        for params in ({"page": 0}, {"page": -1}, {"page": "two"}, {"top": -20}, {"bottom": "end"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/api/v1/book/", params).status_code, 400)
+
+
+class BookCursorTests(TestCase):
+    """Cursor pages cover every row once, in any supported ordering."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [CustomUser.objects.create(username=f"owner{i}", email=f"owner{i}@example.com") for i in range(3)]
+        cls.books = [
+            Book.objects.create(title=f"Book {i % 7}", created_by=users[i % 3] if i % 4 else None)
+            for i in range(45)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, order_by):
+        ids, cursor = [], ""
+        while cursor is not None:
+            response = self.client.get("/api/v1/book/", {"cursor": cursor, "order_by": order_by})
+            self.assertEqual(response.status_code, 200)
+            ids += [book["id"] for book in response.data["objects"]]
+            cursor = response.data["next_cursor"]
+        return ids
+
+    def test_round_trip(self):
+        for order_by in ("title", "-title", "created_by", "-created_by", "created_by__username"):
+            with self.subTest(order_by=order_by):
+                self.assertCountEqual(self.walk(order_by), [book.pk for book in self.books])
+
+    def test_previous_page(self):
+        first = self.client.get("/api/v1/book/", {"cursor": "", "order_by": "-created_by"}).data
+        second = self.client.get("/api/v1/book/", {"cursor": first["next_cursor"], "order_by": "-created_by"}).data
+        previous = self.client.get(
+            "/api/v1/book/", {"cursor": second["previous_cursor"], "order_by": "-created_by"}
+        ).data
+        self.assertEqual(previous["objects"], first["objects"])
+
+    def test_rejected(self):
+        cursor = self.client.get("/api/v1/book/", {"cursor": "", "order_by": "title"}).data["next_cursor"]
+        for params in (
+            {"cursor": "not-a-cursor"},
+            {"cursor": cursor, "order_by": "-title"},  # issued for another ordering
+            {"cursor": "", "order_by": "genres"},
+            {"cursor": "", "order_by": "reviews__rating"},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/api/v1/book/", params).status_code, 400)
+
+
+class BookAutocompleteTests(TestCase):
+    def test_limit(self):
+        with self.captureOnCommitCallbacks(execute=True):  # reaches an index built by an earlier test
+            for i in range(15):
+                Book.objects.create(title=f"Dune {i}", author="Frank Herbert")
+        for limit, expected in (("3", 3), ("10", 10)):
+            response = self.client.get("/api/v1/book/autocomplete/", {"q": "dune", "limit": limit, "type": "title"})
+            self.assertEqual(len(response.data["suggestions"]), expected)
+        for limit in ("0", "-1", "11", "many"):
+            with self.subTest(limit=limit):
+                response = self.client.get("/api/v1/book/autocomplete/", {"q": "dune", "limit": limit})
+                self.assertEqual(response.status_code, 400)
+
+
+class BookSearchTests(TestCase):
+    def test_ranks_every_match(self):
+        Book.objects.bulk_create(Book(title=f"Filler {i}", description="A dragon appears.") for i in range(300))
+        best = Book.objects.create(title="Dragon Dragon", author="Dragon")
+
+        self.assertEqual(search.search_books("dragon", 0, 5)[0][0], best.pk)
+        self.assertEqual(len(search.search_books("dragon", 295, 10)), 6)
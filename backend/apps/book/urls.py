@@ -1,5 +1,6 @@
 from django.urls import path
 from .views import BookView, GenreView, AuthorView
+from apps.review.views import BookReviewView
 
 urlpatterns = [
     path(
@@ -12,6 +13,36 @@ urlpatterns = [
         BookView.as_view({"get": "list", "post": "create"}),
         name="document-list",
     ),
+    path(
+        "bulk/",
+        BookView.as_view({"post": "bulk_create", "patch": "bulk_update", "delete": "bulk_delete"}),
+        name="document-bulk",
+    ),
+    path(
+        "search/",
+        BookView.as_view({"get": "search"}),
+        name="document-search",
+    ),
+    path(
+        "autocomplete/",
+        BookView.as_view({"get": "autocomplete"}),
+        name="document-autocomplete",
+    ),
+    path(
+        "facets/",
+        BookView.as_view({"get": "facets"}),
+        name="document-facets",
+    ),
+    path(
+        "leaderboard/<str:board>/",
+        BookView.as_view({"get": "leaderboard"}),
+        name="document-leaderboard",
+    ),
+    path(
+        "<int:pk>/reviews/",
+        BookReviewView.as_view({"get": "list"}),
+        name="document-reviews",
+    ),
     path(
         "<int:pk>/",
         BookView.as_view({"get": "retrieve", "put": "update", "delete": "destroy"}),
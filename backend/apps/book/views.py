@@ -1,19 +1,43 @@
+import math
+
 from main.utils.generic_api import GenericView
 from .models import Book, Genre, Author
-from .serializer import BookSerializer, GenreSerializer, AuthorSerializer
+from .serializer import BookSerializer, BookListSerializer, GenreSerializer, AuthorSerializer
 from rest_framework.response import Response
 from rest_framework import status
 from main.permissions import IsTokenValidated
-from django.db.models import Count, Avg
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+from main.utils.caching import get_or_compute
+from main.utils.fieldsets import parse_field_list
+from main.utils.metrics import timed
+from . import autocomplete, facets, search
 
 
 # Create your views here.
 class BookView(GenericView):
+    # Aliases of the denormalized rating columns, kept so clients can still
+    # filter and order by total_reviews / average_rating without a GROUP BY
     queryset = Book.objects.annotate(
-        total_reviews=Count('reviews'),  # Annotate total_reviews
-        average_rating=Avg('reviews__rating')  # Annotate average_rating
+        total_reviews=F('rating_count'),
+        average_rating=F('rating_avg'),
     )
     serializer_class = BookSerializer
+    list_serializer_class = BookListSerializer
+    list_actions = GenericView.list_actions + ["search", "facets"]
+    count_policy = "cached"
+    # Landing page lists (?order_by=-rating_weighted, -rating_count) are
+    # served from the shared cache, recomputed by one request at a time
+    cache_key_prefix = "book"
+    allowed_methods = GenericView.allowed_methods + ["bulk_create", "bulk_update", "bulk_delete", "search", "autocomplete", "leaderboard", "facets"]
+    cache_dependencies = ["review.review", "review.comment"]  # review previews with comment counts
+    leaderboards = {
+        # Bayesian average (Book.rating_weighted), few reviews pull towards the prior
+        # Both averages are NULL without reviews, so filter and sort read the same index
+        "best-rated": {"order_by": ["-rating_weighted", "-pk"], "filters": {"rating_weighted__isnull": False}},
+        "highest-average": {"order_by": ["-rating_avg", "-pk"], "filters": {"rating_avg__isnull": False}},
+        "most-reviewed": {"order_by": ["-rating_count", "-pk"]},
+    }
 
     def get_serializer(self, *args, **kwargs):
         # Initialize the serializer with the provided arguments and context
@@ -30,7 +54,169 @@ class BookView(GenericView):
 
     def perform_create(self, serializer):
         # Save the serializer instance
-        serializer.save()
+        instance = serializer.save()
+        self.invalidate_list_cache(instance)
+
+    def build_bulk_instance(self, request, validated_data):
+        return Book(created_by=request.user, **validated_data)
+
+    def post_bulk_create(self, request, instances):
+        self.books_changed(instances)
+
+    def post_bulk_update(self, request, instances):
+        self.books_changed(instances)
+
+    def books_changed(self, instances):
+        # Bulk writes send no model signals, mark the books in the worker's indexes
+        book_ids = [instance.pk for instance in instances]
+        autocomplete.books_changed(book_ids)
+        facets.books_changed(book_ids)
+
+    def search(self, request):
+        """
+        GET /book/search/?q=<text>&page=<n>
+        Full-text search over title, author, description and isbn, best
+        match first (BM25). Each object carries a "search" entry with its
+        score and <mark>-highlighted title, author and description snippet.
+        Accepts ?fields= / ?omit= like list.
+        """
+        if "search" not in self.allowed_methods:
+            return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.initialize_queryset(request)
+
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"error": "Missing search query ?q="}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(1, int(request.query_params.get("page", 1)))
+            self.selected_fields = parse_field_list(request.query_params.get("fields"))
+            self.omitted_fields = parse_field_list(request.query_params.get("omit"))
+            self.build_serializer()
+
+            def compute():
+                return self.get_search_data(text, page)
+
+            if self.cache_key_prefix:
+                cache_key = self.get_list_cache_key(
+                    {}, {}, search=text, page=page, **self.get_selection_params()
+                )
+                data = get_or_compute(cache_key, compute, self.cache_duration, self.cache_stale_duration)
+            else:
+                data = compute()
+        except (ValueError, ValidationError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def autocomplete(self, request):
+        """
+        GET /book/autocomplete/?q=<prefix>&type=title|author&limit=<n>
+        As-you-type title and author suggestions from the worker's
+        in-memory prefix index, most reviewed first.
+        """
+        if "autocomplete" not in self.allowed_methods:
+            return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+        kind = request.query_params.get("type") or None
+        if kind not in (None, autocomplete.TITLE, autocomplete.AUTHOR):
+            return Response({"error": f"Invalid type {kind}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get("limit", autocomplete.MAX_RESULTS))
+        except ValueError:
+            limit = None
+        if limit is None or not 0 < limit <= autocomplete.MAX_RESULTS:
+            return Response(
+                {"error": f"limit must be between 1 and {autocomplete.MAX_RESULTS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        suggestions = autocomplete.get_index().search(request.query_params.get("q", ""), limit, kind)
+        return Response({"suggestions": suggestions}, status=status.HTTP_200_OK)
+
+    def facets(self, request):
+        """
+        GET /book/facets/?genre=<ids>&rating=<stars>&decade=<years>&page=<n>
+        Browse books by genre, rating bucket (4 = 4.0 to 4.99 average) and
+        publication decade (1990), newest first. Values of one facet are
+        OR-ed, facets AND-ed. Returns the page plus the count of every
+        facet value under the other facets' filters, from the worker's
+        in-memory facet index.
+        """
+        if "facets" not in self.allowed_methods:
+            return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.initialize_queryset(request)
+        try:
+            selection = {
+                facet: [int(value) for value in request.query_params.get(facet, "").split(",") if value.strip()]
+                for facet in facets.FACETS
+            }
+            page = max(1, int(request.query_params.get("page", 1)))
+            self.selected_fields = parse_field_list(request.query_params.get("fields"))
+            self.omitted_fields = parse_field_list(request.query_params.get("omit"))
+            self.build_serializer()
+        except (ValueError, ValidationError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_facet_data(selection, page), status=status.HTTP_200_OK)
+
+    def get_facet_data(self, selection, page):
+        index = facets.get_index()
+        with timed("facets"):
+            mask = index.match(selection)
+            total_count = mask.bit_count()
+            book_ids = index.page(mask, (page - 1) * self.size_per_request, self.size_per_request)
+            counts = index.facet_counts(selection)
+
+        books = self.prepare_queryset(self.queryset).in_bulk(book_ids)
+        with timed("serialize"):
+            objects = self.build_serializer([books[pk] for pk in book_ids if pk in books], many=True).data
+
+        genres = Genre.objects.in_bulk(list(counts[facets.GENRE]))
+        return {
+            "objects": objects,
+            "total_count": total_count,
+            "num_pages": max(1, math.ceil(total_count / self.size_per_request)),
+            "current_page": page,
+            "has_next": page * self.size_per_request < total_count,
+            "selection": selection,
+            "facets": {
+                facets.GENRE: sorted(
+                    (
+                        {"value": genre_id, "name": genres[genre_id].name, "count": count}
+                        for genre_id, count in counts[facets.GENRE].items()
+                        if genre_id in genres
+                    ),
+                    key=lambda entry: (-entry["count"], entry["name"]),
+                ),
+                facets.RATING: [
+                    {"value": value, "count": count}
+                    for value, count in sorted(counts[facets.RATING].items(), reverse=True)
+                ],
+                facets.DECADE: [
+                    {"value": value, "count": count}
+                    for value, count in sorted(counts[facets.DECADE].items(), reverse=True)
+                ],
+            },
+        }
+
+    def get_search_data(self, text, page):
+        offset = (page - 1) * self.size_per_request
+        # One extra hit tells whether a next page exists without counting every match
+        hits = search.search_books(text, offset, self.size_per_request + 1)
+        has_next = len(hits) > self.size_per_request
+        hits = hits[: self.size_per_request]
+
+        books = self.prepare_queryset(self.queryset).in_bulk([book_id for book_id, _, _ in hits])
+        ranked = [books[book_id] for book_id, _, _ in hits if book_id in books]
+        with timed("serialize"):
+            objects = self.build_serializer(ranked, many=True).data
+
+        details = {book_id: {"score": score, **highlights} for book_id, score, highlights in hits}
+        for book, object in zip(ranked, objects):
+            object["search"] = details[book.pk]
+        return {
+            "objects": objects,
+            "query": text,
+            "current_page": page,
+            "has_next": has_next,
+        }
 
 class GenreView(GenericView):
     queryset = Genre.objects.all()
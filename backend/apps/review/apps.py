@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TaskConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.review'
+
+    def ready(self):
+        from . import signal  # noqa: F401  (connects the receivers)
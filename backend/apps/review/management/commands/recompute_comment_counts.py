@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from apps.review.models import Review, Comment
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached comment count of reviews from their comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--review", type=int, nargs="*", help="Only recompute these review ids.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.only("pk", "comment_count").order_by("pk")
+        comments = Comment.objects.all()
+        if options["review"]:
+            reviews = reviews.filter(pk__in=options["review"])
+            comments = comments.filter(review_id__in=options["review"])
+
+        counts = dict(
+            comments.order_by().values("review_id").annotate(count=Count("id")).values_list("review_id", "count")
+        )
+
+        changed = []
+        for review in reviews.iterator(chunk_size=options["batch_size"]):
+            expected = counts.get(review.pk, 0)
+            if review.comment_count != expected:
+                review.comment_count = expected
+                changed.append(review)
+
+        with transaction.atomic():
+            Review.objects.bulk_update(changed, ["comment_count"], batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed comment counts, {len(changed)} review(s) corrected."))
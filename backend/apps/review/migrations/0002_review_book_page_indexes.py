@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 18:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0007_book_rating_weighted'),
+        ('review', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['book', 'created_at'], name='review_book_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['book', 'rating', 'created_at'], name='review_book_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 18:32
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_comment_counts(apps, schema_editor):
+    Review = apps.get_model('review', 'Review')
+    Comment = apps.get_model('review', 'Comment')
+    rows = Comment.objects.order_by().values('review_id').annotate(count=Count('id'))
+    for row in rows:
+        Review.objects.filter(pk=row['review_id']).update(comment_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('review', '0002_review_book_page_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', 'created_at'], name='comment_review_created_idx'),
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 18:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0007_book_rating_weighted'),
+        ('review', '0003_review_comment_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at'], name='comment_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['updated_at'], name='review_updated_idx'),
+        ),
+    ]
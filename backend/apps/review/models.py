@@ -1,5 +1,7 @@
 # reviews/models.py
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from apps.account.models import CustomUser
@@ -16,26 +18,55 @@ class Review(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by the comment signals (apps/review/signal.py) and repaired
+    # with `manage.py recompute_comment_counts`
+    comment_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         verbose_name = _("Review")
         verbose_name_plural = _("Reviews")
         unique_together = ['user', 'book']  # One review per user per book
         ordering = ['-created_at']
+        indexes = [
+            # Per-book review pages (apps/review/views.py BookReviewView)
+            models.Index(fields=['book', 'created_at'], name='review_book_created_idx'),
+            models.Index(fields=['book', 'rating', 'created_at'], name='review_book_rating_idx'),
+            # Max(updated_at) validating conditional list GETs
+            models.Index(fields=['updated_at'], name='review_updated_idx'),
+        ]
         
     def __str__(self):
         return f"{self.user.username}'s review of {self.book.title}"
-    
-    def save(self, *args, **kwargs):
-        """Update user review count on save"""
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        # Update user review count if this is a new review
-        if is_new:
-            user = self.user
-            user.reviews_count = user.reviews.count()
-            user.save(update_fields=['reviews_count'])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating()
+        return instance
+
+    def remember_rating(self):
+        """Snapshot the stored (book, rating) so the signals can diff rating changes."""
+        deferred = self.get_deferred_fields()
+        if "book_id" in deferred or "rating" in deferred:
+            self._stored_rating = None
+        else:
+            self._stored_rating = (self.book_id, self.rating)
+
+    def get_stored_rating(self):
+        stored = getattr(self, "_stored_rating", None)
+        if stored is None and self.pk is not None:
+            stored = (
+                Review.objects.filter(pk=self.pk).values_list("book_id", "rating").first()
+            )
+        return stored
+
+    @classmethod
+    def adjust_comment_count(cls, review_id, delta):
+        """Add or remove comments from the cached count with a single atomic UPDATE."""
+        cls.objects.filter(pk=review_id).update(
+            comment_count=Greatest(F("comment_count") + delta, 0)
+        )
+
 
 class Comment(models.Model):
     """Model for comments on reviews"""
@@ -49,6 +80,27 @@ class Comment(models.Model):
         verbose_name = _("Comment")
         verbose_name_plural = _("Comments")
         ordering = ['created_at']
+        indexes = [
+            # Comment pages of a review, oldest first
+            models.Index(fields=['review', 'created_at'], name='comment_review_created_idx'),
+            models.Index(fields=['updated_at'], name='comment_updated_idx'),
+        ]
         
     def __str__(self):
-        return f"Comment by {self.user.username} on {self.review}"
\ No newline at end of file
+        return f"Comment by {self.user.username} on {self.review}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_review()
+        return instance
+
+    def remember_review(self):
+        """Snapshot the stored review so the signals can move the count when it changes."""
+        self._stored_review_id = None if "review_id" in self.get_deferred_fields() else self.review_id
+
+    def get_stored_review_id(self):
+        stored = getattr(self, "_stored_review_id", None)
+        if stored is None and self.pk is not None:
+            stored = Comment.objects.filter(pk=self.pk).values_list("review_id", flat=True).first()
+        return stored
\ No newline at end of file
@@ -1,6 +1,17 @@
 from .models import Review, Comment
+from apps.book.models import Book
+from django.db.models import Prefetch
 from rest_framework import serializers
-from apps.account.serializer import CustomUserSerializer
+from apps.account.serializer import PublicUserSerializer
+from main.utils.pagination import CursorPaginator
+
+REVIEW_PAGE_SIZE = 20
+# Orderings of a book's reviews; each one is served by a (book, ...) index
+REVIEW_SORTS = {
+    "newest": ["-created_at"],
+    "highest": ["-rating", "-created_at"],
+    "lowest": ["rating", "created_at"],
+}
 
 class CommentSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -10,21 +21,43 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ['user', 'username' 'created_at', 'updated_at']
 
+class ReviewPreviewSerializer(serializers.ModelSerializer):
+    """Compact review embedded in book lists: no comments, only the author's name."""
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ["id", "user", "username", "rating", "title", "body", "comment_count", "created_at"]
+        read_only_fields = fields
+
+
+def get_review_page(book_id, sort="newest", cursor=None, size=REVIEW_PAGE_SIZE):
+    """One cursor page of a book's reviews, as served by /book/<pk>/reviews/."""
+    queryset = Review.objects.filter(book_id=book_id).select_related('user').only(
+        'id', 'book_id', 'user_id', 'user__username', 'rating', 'title', 'body', 'comment_count', 'created_at'
+    )
+    paginator = CursorPaginator(queryset, REVIEW_SORTS[sort], size)
+    return paginator.get_page(cursor)
+
 class ReviewSerializer(serializers.ModelSerializer):
-    user = CustomUserSerializer(read_only=True)
+    user = PublicUserSerializer(read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
     average_rating = serializers.SerializerMethodField()
     class Meta:
         model = Review
         fields = "__all__"
         read_only_fields = ['user', 'created_at', 'updated_at', 'comments']
+        # Book ratings of the whole page in one query, over the distinct books
+        prefetch_related_fields = {
+            "average_rating": [Prefetch('book', queryset=Book.objects.only('id', 'rating_avg'))],
+        }
     
     def pre_create(self, request):
     # Automatically associate reviews with the requesting user
         request.data['user'] = request.user.id
 
     def get_average_rating(self, obj):
-        return obj.book.average_rating if hasattr(obj.book, 'average_rating') else None
+        return obj.book.rating_avg
     
     def validate_rating(self, value):
         if not 1 <= value <= 5:
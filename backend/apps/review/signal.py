@@ -1,8 +1,75 @@
 # reviews/signals.py
-from django.db.models.signals import post_save, post_delete
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Review
+from apps.account.models import CustomUser
+from apps.book import facets
+from apps.book.models import Book
+from main.utils.caching import invalidate_namespace
+from .models import Review, Comment
 
-@receiver([post_save, post_delete], sender=Review)
-def update_book_ratings(sender, instance, **kwargs):
-    instance.book.update_rating_stats()
\ No newline at end of file
+@receiver(pre_save, sender=Review)
+def capture_stored_rating(sender, instance, raw=False, **kwargs):
+    # Read before the row is overwritten; an instance built in memory with the
+    # pk of a stored row updates it too, so only a missing pk means a new row
+    instance._previous_rating = None if raw or instance.pk is None else instance.get_stored_rating()
+
+@receiver(post_save, sender=Review)
+def update_review_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        CustomUser.adjust_counts(instance.user_id, reviews=1)
+    current = (instance.book_id, instance.rating)
+    previous = None if created else instance._previous_rating
+    if previous != current:
+        if previous is not None:
+            Book.adjust_rating_stats(*previous, delta=-1)
+        Book.adjust_rating_stats(*current, delta=1)
+        facets.books_changed({previous[0] if previous else current[0], current[0]})
+    _invalidate_review_caches({previous[0] if previous else current[0], current[0]})
+    instance.remember_rating()
+
+@receiver(post_delete, sender=Review)
+def remove_review_stats(sender, instance, origin=None, **kwargs):
+    if not _deleted_with(origin, CustomUser):
+        CustomUser.adjust_counts(instance.user_id, reviews=-1)
+    # Reviews cascading from a deleted book have no stats left to maintain
+    if _deleted_with(origin, Book):
+        return
+    stored = getattr(instance, "_stored_rating", None) or (instance.book_id, instance.rating)
+    Book.adjust_rating_stats(*stored, delta=-1)
+    facets.books_changed([stored[0]])
+    _invalidate_review_caches([stored[0]])
+
+@receiver(pre_save, sender=Comment)
+def capture_stored_review(sender, instance, raw=False, **kwargs):
+    instance._previous_review_id = None if raw or instance.pk is None else instance.get_stored_review_id()
+
+@receiver(post_save, sender=Comment)
+def update_comment_count(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance._previous_review_id
+    if created or previous != instance.review_id:
+        if previous is not None:
+            Review.adjust_comment_count(previous, -1)
+        Review.adjust_comment_count(instance.review_id, 1)
+    instance.remember_review()
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_count(sender, instance, origin=None, **kwargs):
+    # Comments cascading from a deleted review (or its book) leave no count behind
+    if _deleted_with(origin, Review) or _deleted_with(origin, Book):
+        return
+    Review.adjust_comment_count(getattr(instance, "_stored_review_id", None) or instance.review_id, -1)
+
+def _invalidate_review_caches(book_ids):
+    # Reviews written outside ReviewView (ORM, admin, seeding) would leave the
+    # cached books and reviews rendering them stale, bumped on commit
+    invalidate_namespace(Book._meta.label_lower, [])
+    invalidate_namespace(Review._meta.label_lower, [f"book:{book_id}" for book_id in book_ids])
+
+def _deleted_with(origin, model):
+    """Whether a delete cascades from `model` (an instance or a queryset of it)."""
+    return isinstance(origin, model) or (isinstance(origin, QuerySet) and origin.model is model)
@@ -1,3 +1,260 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.account.models import CustomUser
+from apps.book.models import RATINGS, Book, weighted_rating
+from main.utils.metrics import assert_max_queries
+
+from .models import Comment, Review
+
+
+class ReviewQueryBudgetTests(TestCase):
+    """Review lists render a full page in a constant number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create(username=f"reader{i}", email=f"reader{i}@example.com")
+            for i in range(25)
+        ]
+        cls.books = [Book.objects.create(title=f"Book {i}", created_by=cls.users[0]) for i in range(2)]
+        for book in cls.books:
+            for i, user in enumerate(cls.users):
+                review = Review.objects.create(user=user, book=book, title="Review", body="Body", rating=i % 5 + 1)
+                for commenter in cls.users[:2]:
+                    Comment.objects.create(user=commenter, review=review, body="Comment")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def test_list(self):
+        with assert_max_queries(6, "ReviewView.list"):
+            response = self.client.get("/api/v1/review/reviews/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["objects"]), 20)
+
+    def test_list_of_book(self):
+        with assert_max_queries(6, "ReviewView.list ?book="):
+            response = self.client.get("/api/v1/review/reviews/", {"book": self.books[0].pk, "page": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["objects"]), 5)
+        self.assertTrue(all(review["book"] == self.books[0].pk for review in response.data["objects"]))
+
+
+class BookRatingStatsTests(TestCase):
+    """The review signals keep Book's rating statistics equal to a recount."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [CustomUser.objects.create(username=f"reader{i}", email=f"reader{i}@example.com") for i in range(3)]
+
+    def setUp(self):
+        self.book = Book.objects.create(title="Book")
+        self.other_book = Book.objects.create(title="Other book")
+
+    def review(self, user, rating, book=None):
+        return Review.objects.create(user=user, book=book or self.book, title="Review", body="Body", rating=rating)
+
+    def assertStats(self, book, ratings):
+        book.refresh_from_db()
+        self.assertEqual(book.rating_count, len(ratings))
+        self.assertEqual(book.rating_sum, sum(ratings))
+        self.assertEqual(book.rating_histogram, {rating: ratings.count(rating) for rating in RATINGS})
+        if ratings:
+            self.assertAlmostEqual(book.rating_avg, sum(ratings) / len(ratings))
+            self.assertAlmostEqual(book.rating_weighted, weighted_rating(sum(ratings), len(ratings)))
+        else:
+            self.assertIsNone(book.rating_avg)
+            self.assertIsNone(book.rating_weighted)
+
+    def assertMatchesRecount(self):
+        output = StringIO()
+        call_command("recompute_rating_stats", stdout=output)
+        self.assertIn(" 0 book(s) corrected", output.getvalue())
+
+    def test_create(self):
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 2)
+        self.assertStats(self.book, [5, 2])
+        self.assertStats(self.other_book, [])
+        self.assertMatchesRecount()
+
+    def test_change_rating(self):
+        review = self.review(self.users[0], 5)
+        self.review(self.users[1], 4)
+        review.rating = 1
+        review.save()
+        self.assertStats(self.book, [1, 4])
+
+        # Loaded from the database, and saved again without a change
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 3
+        review.save()
+        review.save()
+        self.assertStats(self.book, [3, 4])
+        self.assertMatchesRecount()
+
+    def test_change_rating_of_unloaded_instance(self):
+        review = self.review(self.users[0], 5)
+        Review(
+            pk=review.pk, user=self.users[0], book=self.book, title="Review", body="Body", rating=2,
+            created_at=review.created_at,
+        ).save()
+        self.assertStats(self.book, [2])
+
+    def test_move_to_other_book(self):
+        review = self.review(self.users[0], 5)
+        self.review(self.users[1], 3)
+        review.book = self.other_book
+        review.rating = 4
+        review.save()
+        self.assertStats(self.book, [3])
+        self.assertStats(self.other_book, [4])
+        self.assertMatchesRecount()
+
+    def test_delete(self):
+        review = self.review(self.users[0], 5)
+        self.review(self.users[1], 3)
+        self.review(self.users[2], 1)
+        review.delete()
+        self.assertStats(self.book, [3, 1])
+
+        Review.objects.filter(book=self.book).delete()
+        self.assertStats(self.book, [])
+        self.assertMatchesRecount()
+
+    def test_delete_after_unsaved_change(self):
+        # The stored rating is removed, not the one edited in memory
+        review = self.review(self.users[0], 5)
+        review.rating = 1
+        review.delete()
+        self.assertStats(self.book, [])
+
+    def test_cascade_from_user(self):
+        self.review(self.users[0], 5)
+        self.review(self.users[0], 2, book=self.other_book)
+        self.review(self.users[1], 4)
+        self.users[0].delete()
+        self.assertStats(self.book, [4])
+        self.assertStats(self.other_book, [])
+        self.assertMatchesRecount()
+
+    def test_cascade_from_book(self):
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 4, book=self.other_book)
+        self.book.delete()
+        self.assertFalse(Review.objects.filter(book_id=self.book.pk).exists())
+        self.assertStats(self.other_book, [4])
+        self.assertMatchesRecount()
+
+
+class ReviewCacheInvalidationTests(TestCase):
+    """Reviews written through the ORM expire the cached books that render their ratings."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username="reader", email="reader@example.com")
+        self.book = Book.objects.create(title="Book")
+        self.url = f"/api/v1/book/{self.book.pk}/"
+
+    def write(self, function, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+    def test_detail(self):
+        etag = self.client.get(self.url)["ETag"]
+        review = self.write(Review.objects.create, user=self.user, book=self.book, title="Review", body="Body", rating=4)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["total_reviews"], response.data["average_rating"]), (1, 4))
+
+        review.rating = 2
+        self.write(review.save)
+        self.assertEqual(self.client.get(self.url).data["average_rating"], 2)
+        self.write(review.delete)
+        self.assertEqual(self.client.get(self.url).data["total_reviews"], 0)
+
+    def test_list(self):
+        self.client.get("/api/v1/book/")
+        self.write(Review.objects.create, user=self.user, book=self.book, title="Review", body="Body", rating=5)
+        book = self.client.get("/api/v1/book/").data["objects"][0]
+        self.assertEqual((book["total_reviews"], book["average_rating"]), (1, 5))
+
+
+class CommentCountTests(TestCase):
+    """The comment signals keep Review.comment_count equal to a recount."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="reader", email="reader@example.com")
+        self.book = Book.objects.create(title="Book")
+        self.reviews = [
+            Review.objects.create(user=user, book=self.book, title="Review", body="Body", rating=4)
+            for user in (self.user, CustomUser.objects.create(username="other", email="other@example.com"))
+        ]
+
+    def comment(self, review):
+        return Comment.objects.create(user=self.user, review=review, body="Comment")
+
+    def assertCounts(self, *counts):
+        self.assertEqual([Review.objects.get(pk=review.pk).comment_count for review in self.reviews], list(counts))
+
+    def assertMatchesRecount(self):
+        output = StringIO()
+        call_command("recompute_comment_counts", stdout=output)
+        self.assertIn(" 0 review(s) corrected", output.getvalue())
+
+    def test_create_and_edit(self):
+        comment = self.comment(self.reviews[0])
+        self.comment(self.reviews[0])
+        self.assertCounts(2, 0)
+
+        comment.body = "Edited"
+        comment.save()
+        self.assertCounts(2, 0)
+        self.assertMatchesRecount()
+
+    def test_move_to_other_review(self):
+        comment = self.comment(self.reviews[0])
+        comment.review = self.reviews[1]
+        comment.save()
+        self.assertCounts(0, 1)
+
+        Comment(pk=comment.pk, user=self.user, review=self.reviews[0], body="Moved", created_at=comment.created_at).save()
+        self.assertCounts(1, 0)
+        self.assertMatchesRecount()
+
+    def test_delete(self):
+        comment = self.comment(self.reviews[0])
+        self.comment(self.reviews[0])
+        self.comment(self.reviews[1])
+        comment.delete()
+        self.assertCounts(1, 1)
+        Comment.objects.filter(review=self.reviews[0]).delete()
+        self.assertCounts(0, 1)
+        self.assertMatchesRecount()
+
+    def test_cascade(self):
+        self.comment(self.reviews[0])
+        self.comment(self.reviews[1])
+        self.reviews[0].delete()
+        self.assertFalse(Comment.objects.filter(review_id=self.reviews[0].pk).exists())
+        self.assertEqual(Review.objects.get(pk=self.reviews[1].pk).comment_count, 1)
+
+        self.book.delete()
+        self.assertFalse(Comment.objects.exists())
+        self.assertMatchesRecount()
 
-# Create your tests here.
+    def test_cascade_from_user(self):
+        # The user's comments go with them, including those on other users' reviews
+        self.comment(self.reviews[1])
+        Comment.objects.create(user=self.reviews[1].user, review=self.reviews[1], body="Comment")
+        self.user.delete()
+        self.assertEqual(Review.objects.get(pk=self.reviews[1].pk).comment_count, 1)
+        self.assertMatchesRecount()
@@ -3,17 +3,20 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied
 from main.utils.generic_api import GenericView
+from main.utils.caching import invalidate_namespace
+from main.utils.pagination import CursorPaginator
 from .models import Review, Comment
-from .serializer import ReviewSerializer, CommentSerializer
+from .serializer import ReviewSerializer, ReviewPreviewSerializer, CommentSerializer, REVIEW_PAGE_SIZE, REVIEW_SORTS
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
+from rest_framework.exceptions import ValidationError
 
 class ReviewView(GenericView):
-    queryset = Review.objects.select_related('user', 'book').annotate(
-        average_rating=Avg('book__reviews__rating')  # Annotate average_rating
-    )
+    # Users, comments and the books' ratings are batch-loaded by the related plan
+    queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    cache_tag_fields = ["book", "user"]
+    cache_dependencies = ["review.comment"]
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -25,14 +28,6 @@ class ReviewView(GenericView):
     def pre_create(self, request):
         # Automatically associate reviews with the requesting user
         request.data['user'] = request.user.id
-        
-    def post_create(self, request, instance):
-        # Update user's review count
-        instance.user.update_counts()
-        
-    def pre_destroy(self, instance):
-        # Update user's review count when a review is deleted
-        instance.user.update_counts()
 
     def create(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
@@ -46,8 +41,7 @@ class ReviewView(GenericView):
             )
         # Save while injecting user (since 'user' is read_only)
         instance = serializer.save(user=request.user)
-
-        self.post_create(request, instance)  # Call your custom post-create hook
+        self.invalidate_list_cache(instance)
 
         response_serializer = self.serializer_class(instance)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -57,25 +51,63 @@ class ReviewView(GenericView):
         review = self.get_object()
         serializer = CommentSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user, review=review)
+            comment = serializer.save(user=request.user, review=review)
+            invalidate_namespace(Comment._meta.label_lower, [f"review:{review.pk}"])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
-        review = self.get_object()
-        comments = review.comments.all()
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        """Comments of a review, oldest first, paged by cursor: ?cursor=<next_cursor>"""
+        review = get_object_or_404(Review.objects.only('pk'), pk=pk)
+        comments = Comment.objects.filter(review=review).select_related('user')
+        paginator = CursorPaginator(comments, CommentView.default_order_by, CommentView.size_per_request)
+        objects, next_cursor, previous_cursor = paginator.get_page(request.query_params.get('cursor'))
+        return Response({
+            "objects": CommentSerializer(objects, many=True).data,
+            "next_cursor": next_cursor,
+            "previous_cursor": previous_cursor,
+        })
     
     def get_object(self):
         """Retrieve the review instance based on the primary key (pk)."""
         pk = self.kwargs.get('pk')
         return get_object_or_404(self.queryset, pk=pk)
 
+class BookReviewView(GenericView):
+    """
+    Reviews of one book, paged by cursor:
+    /book/<pk>/reviews/?sort=newest|highest|lowest&cursor=<next_cursor>
+    """
+    queryset = Review.objects.all()
+    serializer_class = ReviewPreviewSerializer
+    allowed_methods = ["list"]
+    allowed_filter_fields = []
+    pagination_mode = "cursor"
+    size_per_request = REVIEW_PAGE_SIZE
+    control_params = GenericView.control_params + ["sort"]
+    cache_tag_fields = ["book"]
+    cache_dependencies = ["review.comment"]  # comment_count
+
+    def list(self, request, pk=None):
+        return super().list(request)
+
+    def parse_query_params(self, request):
+        filters, excludes = super().parse_query_params(request)
+        sort = filters.pop("sort", "newest")
+        if sort not in REVIEW_SORTS:
+            raise ValidationError(f"Unknown sort '{sort}', expected one of: {', '.join(REVIEW_SORTS)}")
+        # The book filter keeps cache keys, tags and ETags per book
+        filters["book"] = self.kwargs["pk"]
+        filters["order_by"] = REVIEW_SORTS[sort]
+        return filters, excludes
+
 class CommentView(GenericView):
-    queryset = Comment.objects.select_related('user', 'review')
+    queryset = Comment.objects.select_related('user')
     serializer_class = CommentSerializer
+    cache_tag_fields = ["review"]
+    pagination_mode = "cursor"
+    default_order_by = "created_at"  # with ?review=<id>, served by Comment(review, created_at)
 
     def pre_update(self, request, instance):
         if instance.user != request.user:
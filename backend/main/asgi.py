@@ -13,8 +13,6 @@ from django.core.asgi import get_asgi_application
 
 load_dotenv()
 
-os.environ.setdefault(
-    "DJANGO_SETTINGS_MODULE", f"main.settings.{os.getenv('ENVIRONMENT')}"
-)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
 
 application = get_asgi_application()
@@ -0,0 +1,159 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _user_cache_key(user_id):
+    return f"auth_user:{user_id}"
+
+
+def get_cached_user(user_id):
+    """
+    Resolve a user by id through the cache, so authenticating a request
+    costs no query while the entry lives. Entries are dropped when the
+    user is saved or deleted (apps/account/signal.py) and otherwise expire
+    after AUTH_USER_CACHE_TTL seconds. Raises DoesNotExist like .get().
+    """
+    key = _user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model()._default_manager.get(pk=user_id)
+        cache.set(key, user, getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+    return user
+
+
+def forget_cached_user(user_id):
+    cache.delete(_user_cache_key(user_id))
+
+
+class VerifiedTokenCache:
+    """
+    # VerifiedTokenCache
+    Bounded LRU of validated tokens keyed by the SHA-256 of the raw token,
+    so a token seen again skips decoding and the signature check. Entries
+    are dropped at the token's exp, then validated (and rejected) again.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()  # digest -> (token, exp)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def digest(raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token):
+        key = self.digest(raw_token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            token, exp = entry
+            if exp <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return token
+
+    def put(self, raw_token, token):
+        exp = token.get("exp")
+        if exp is None:
+            return
+        with self.lock:
+            self.entries[self.digest(raw_token)] = (token, exp)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, raw_token):
+        with self.lock:
+            self.entries.pop(self.digest(raw_token), None)
+
+
+verified_tokens = VerifiedTokenCache(getattr(settings, "AUTH_TOKEN_CACHE_SIZE", 10000))
+
+
+def _revoked_key(token):
+    return f"auth_revoked:{token[api_settings.JTI_CLAIM]}"
+
+
+def is_revoked(token):
+    return api_settings.JTI_CLAIM in token and cache.get(_revoked_key(token)) is not None
+
+
+def validate_access_token(raw_token):
+    """
+    AccessToken(raw_token) through the verified-token cache. Raises
+    TokenError for invalid, expired and revoked tokens.
+    """
+    token = verified_tokens.get(raw_token)
+    if token is None:
+        token = AccessToken(raw_token)
+        verified_tokens.put(raw_token, token)
+    if is_revoked(token):
+        raise TokenError(_("Token has been revoked"))
+    return token
+
+
+def revoke_token(raw_token):
+    """
+    Reject an access token until it expires. The revocation is kept in the
+    default cache, not only this worker's LRU, so every worker honours it
+    when that cache is shared (REDIS_URL, see main/checks.py).
+    """
+    token = validate_access_token(raw_token)
+    if api_settings.JTI_CLAIM not in token:
+        raise TokenError(_("Token has no id and cannot be revoked"))
+    cache.set(_revoked_key(token), True, max(1, int(token["exp"] - time.time()) + 1))
+    verified_tokens.discard(raw_token)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication validating tokens through the verified-token cache
+    and resolving their user through get_cached_user.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = verified_tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            verified_tokens.put(raw_token, token)
+        if is_revoked(token):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = get_cached_user(user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
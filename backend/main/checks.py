@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Token revocations (main.authentication.revoke_token), cache generations
+    and single-flight locks (main.utils.caching) only hold across workers
+    when the default cache is shared. Reported by `manage.py check --deploy`.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            f"The default cache ({backend}) is local to each process.",
+            hint=(
+                "Set REDIS_URL. Otherwise a token revoked on logout stays valid on "
+                "the other workers, and writes do not invalidate their cached lists."
+            ),
+            id="main.E001",
+        )
+    ]
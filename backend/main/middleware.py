@@ -0,0 +1,78 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from main.utils.metrics import collect_metrics, track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record SQL query count, DB time, serializer time and cache events for
+    every request. Reported per endpoint and action as a Server-Timing
+    header and a structured log line.
+
+    **Settings**
+    - REQUEST_METRICS_HEADER: send the Server-Timing header (default: True)
+    - REQUEST_METRICS_LOG: log one line per request (default: True)
+
+    Runs sync or async, so async views stay on the event loop under ASGI.
+    There, sync views query from a worker thread with its own connections;
+    process_view runs in that thread and starts counting them.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with collect_metrics() as metrics:
+            request.metrics_endpoint = None
+            response = self.get_response(request)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        with collect_metrics() as metrics:
+            request.metrics_endpoint = None
+            response = await self.get_response(request)
+        return self.report(request, response, metrics)
+
+    def report(self, request, response, metrics):
+        if getattr(settings, "REQUEST_METRICS_HEADER", True):
+            response["Server-Timing"] = metrics.server_timing()
+        if getattr(settings, "REQUEST_METRICS_LOG", True):
+            endpoint, action = request.metrics_endpoint or (request.path, None)
+            logger.info(
+                json.dumps(
+                    {
+                        "endpoint": endpoint,
+                        "action": action,
+                        "method": request.method,
+                        "status": response.status_code,
+                        **metrics.as_dict(),
+                    }
+                )
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        track_queries()
+        view_class = getattr(view_func, "cls", None)
+        if view_class is None:
+            return None
+        actions = getattr(view_func, "actions", None) or {}
+        request.metrics_endpoint = (
+            view_class.__name__,
+            actions.get(request.method.lower(), request.method.lower()),
+        )
+        return None
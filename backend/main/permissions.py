@@ -1,11 +1,11 @@
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import AuthenticationFailed
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.tokens import Token
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from django.conf import settings
 from rest_framework import status
 import logging
-from apps.account.models import CustomUser
+from main.authentication import get_cached_user, validate_access_token
 # Get logger instance
 logger = logging.getLogger(__name__)
 
@@ -15,6 +15,10 @@ class IsTokenValidated(BasePermission):
     """
     
     def has_permission(self, request, view):
+        # Already verified by the JWT authentication class, reuse its user
+        if isinstance(request.auth, Token) and request.user.is_authenticated:
+            return True
+
         # Get the token from the Authorization header
         auth_header = request.headers.get('Authorization')
                         
@@ -30,14 +34,14 @@ class IsTokenValidated(BasePermission):
             token = auth_header.split(' ')[1]
             logger.debug('Attempting to verify token')
             
-            # Verify the token using SimpleJWT
-            access_token = AccessToken(token)
+            # Verify the token using SimpleJWT, once per token and worker
+            access_token = validate_access_token(token)
             payload = access_token.payload
             
             logger.debug(f"payload: {payload}")
             
             # Store the user in the request for later use
-            request.user = CustomUser.objects.get(id=payload['user_id'])
+            request.user = get_cached_user(payload['user_id'])
             logger.info('Token successfully verified')
             
             return True
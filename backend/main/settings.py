@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'account.CustomUser'
 
 MIDDLEWARE = [
+    'main.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -95,6 +96,27 @@ DATABASES = {
 }
 
 
+# Cache
+# Token revocations, cache generations and recompute locks must be seen by
+# every worker, so deployments with more than one process set REDIS_URL.
+# The in-process fallback only suits a single runserver (see main/checks.py).
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -155,7 +177,7 @@ CSRF_COOKIE_SECURE = False  # Set to True in production with HTTPS
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'main.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -176,6 +198,20 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Seconds an authenticated user is served from the cache (main.authentication)
+AUTH_USER_CACHE_TTL = 60
+# Validated access tokens kept per worker, until their exp (main.authentication)
+AUTH_TOKEN_CACHE_SIZE = 10000
+
+# Password hashing pool of the async login and registration views
+# (apps/account/hashing.py); None for min(4, CPU count) threads
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_QUEUE = 32  # logins waiting for a thread before answering 503
+
+# Request metrics (see main.middleware.RequestMetricsMiddleware)
+REQUEST_METRICS_HEADER = True  # Server-Timing response header
+REQUEST_METRICS_LOG = True  # one structured log line per request
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
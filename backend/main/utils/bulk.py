@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+from django.utils import timezone
+from rest_framework import serializers
+
+
+def preload_related_fields(serializer, items):
+    """
+    Resolve every primary key referenced by `items` for the serializer's
+    PrimaryKeyRelatedFields with one query per field, instead of one
+    query per item and value during validation.
+    """
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        relation = field.child_relation if isinstance(field, serializers.ManyRelatedField) else field
+        if not isinstance(relation, serializers.PrimaryKeyRelatedField) or relation.pk_field:
+            continue
+
+        pks = set()
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            values = value if isinstance(value, (list, tuple)) else [value]
+            pks.update(str(v) for v in values if isinstance(v, (int, str)) and not isinstance(v, bool))
+        if not pks:
+            continue
+
+        try:
+            found = relation.get_queryset().in_bulk(list(pks))
+        except (TypeError, ValueError):
+            continue  # malformed keys are reported by the regular lookup
+        objects = {str(pk): obj for pk, obj in found.items()}
+        relation.to_internal_value = _preloaded_lookup(relation, objects)
+
+
+def _preloaded_lookup(relation, objects):
+    def to_internal_value(data):
+        if isinstance(data, bool):
+            relation.fail("incorrect_type", data_type=type(data).__name__)
+        obj = objects.get(str(data))
+        if obj is None:
+            relation.fail("does_not_exist", pk_value=data)
+        return obj
+
+    return to_internal_value
+
+
+def split_many_to_many(model, validated_data):
+    """Pop many-to-many values, which cannot go through bulk_create/bulk_update."""
+    many_to_many = {}
+    for field in model._meta.many_to_many:
+        if field.name in validated_data:
+            many_to_many[field.name] = validated_data.pop(field.name)
+    return many_to_many
+
+
+def set_many_to_many(model, instances, values):
+    """Insert the many-to-many rows of freshly created instances in bulk."""
+    rows = defaultdict(list)
+    for instance, many_to_many in zip(instances, values):
+        for name, related in many_to_many.items():
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            rows[through].extend(
+                through(**{source: instance.pk, target: obj.pk}) for obj in related
+            )
+    for through, objects in rows.items():
+        through.objects.bulk_create(objects, ignore_conflicts=True)
+
+
+def touch_auto_now_fields(model, instances):
+    """bulk_update skips pre_save, so auto_now fields are set by hand."""
+    names = [
+        field.name
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+    ]
+    now = timezone.now()
+    for instance in instances:
+        for name in names:
+            setattr(instance, name, now)
+    return names
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from main.utils.metrics import record_cache
+
+
+def _generation_key(namespace):
+    return f"{namespace}_generation"
+
+
+def _seed_generation():
+    # Seeded from the clock so a counter evicted from the cache never
+    # restarts at a value that older entries were written under
+    return int(time.time() * 1000)
+
+
+def get_generations(namespaces):
+    """Return the current generation of each namespace in one cache round-trip."""
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+
+    generations = []
+    for key in keys:
+        generation = found.get(key)
+        if generation is None:
+            generation = _seed_generation()
+            if not cache.add(key, generation, None):
+                generation = cache.get(key, generation)
+        generations.append(generation)
+    return generations
+
+
+def bump_generation(namespace):
+    """
+    Invalidate every cache entry built under `namespace` with one atomic
+    increment. Stale entries are never read again and simply expire.
+    """
+    key = _generation_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        generation = _seed_generation()
+        if not cache.add(key, generation, None):
+            return cache.incr(key)
+        return generation
+
+
+def invalidate_namespace(namespace, tags=None):
+    """
+    Invalidate a namespace. Without tags every entry of the namespace is
+    dropped; with tags, only unscoped entries and entries scoped to those
+    tags are.
+
+    Inside a transaction the generations are bumped once it commits (and
+    not at all on rollback): bumped earlier, a concurrent request could
+    recompute from the old rows and store them under the new generation.
+    """
+    namespaces = [namespace] if tags is None else [f"{namespace}:all"] + [
+        f"{namespace}:{tag}" for tag in tags
+    ]
+
+    def bump():
+        for name in namespaces:
+            bump_generation(name)
+
+    transaction.on_commit(bump)
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalize(v) for v in value), key=repr)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def stable_digest(*parts):
+    """
+    Digest of JSON-like values that is identical in every process
+    (unlike hash(), which is salted per interpreter by PYTHONHASHSEED).
+    Dict keys are sorted, so parameter order does not matter.
+    """
+    canonical = json.dumps(_normalize(parts), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def set_cached(key, value, timeout, stale_timeout=0):
+    """
+    Store `value` for single-flight reads. The entry is fresh for `timeout`
+    seconds and may be served stale for `stale_timeout` more seconds while
+    one request recomputes it.
+    """
+    entry = {"value": value, "fresh_until": time.time() + timeout}
+    cache.set(key, entry, timeout + stale_timeout)
+    record_cache("set")
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=0, lock_timeout=30, wait_timeout=2.0):
+    """
+    Return the cached value for `key`, calling `compute()` on a miss.
+
+    Only one request per key (through an atomic cache.add lock, so across
+    processes when the cache is shared) recomputes an expired entry. Concurrent requests get
+    the stale value meanwhile or, when there is none, wait up to
+    `wait_timeout` seconds for the lock holder to publish it.
+    """
+    entry = cache.get(key)
+    if entry is not None and entry["fresh_until"] > time.time():
+        record_cache("hit")
+        return entry["value"]
+    record_cache("miss" if entry is None else "stale")
+
+    lock_key = f"{key}_lock"
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            value = compute()
+            set_cached(key, value, timeout, stale_timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        return entry["value"]
+
+    deadline = time.time() + wait_timeout
+    while time.time() < deadline:
+        time.sleep(0.025)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"]
+        if cache.get(lock_key) is None:
+            break
+
+    # The lock holder failed or is too slow; compute without publishing
+    return compute()
@@ -0,0 +1,41 @@
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from main.utils.caching import stable_digest
+
+
+def make_etag(*parts):
+    return f'W/"{stable_digest(*parts)}"'
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    Evaluate If-None-Match (which takes precedence) and If-Modified-Since
+    against the validators. `last_modified` is a unix timestamp.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        # Weak comparison, as required for GET
+        opaque = etag.removeprefix("W/")
+        return any(
+            tag == "*" or tag.removeprefix("W/") == opaque for tag in parse_etags(if_none_match)
+        )
+
+    if last_modified is not None:
+        if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since"))
+        return if_modified_since is not None and int(last_modified) <= if_modified_since
+    return False
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Clients may store the response but must revalidate it on every use
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
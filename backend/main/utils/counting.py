@@ -0,0 +1,59 @@
+import json
+import logging
+
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Cheapest first; a request may lower the view's policy but never raise it
+COUNT_POLICIES = ["none", "estimated", "cached", "exact"]
+
+
+def resolve_count_policy(view_policy, requested_policy=None):
+    if view_policy not in COUNT_POLICIES:
+        raise ValueError(f"Unknown count policy: {view_policy}")
+    if requested_policy not in COUNT_POLICIES:
+        return view_policy
+    return min(view_policy, requested_policy, key=COUNT_POLICIES.index)
+
+
+def estimate_count(queryset):
+    """
+    Estimate the number of rows of a queryset from planner/table statistics.
+    Returns None when the database has no usable estimate.
+    """
+    connection = connections[queryset.db]
+    try:
+        if connection.vendor == "postgresql":
+            return _estimate_postgresql(queryset, connection)
+        if connection.vendor == "sqlite":
+            return _estimate_sqlite(queryset, connection)
+    except DatabaseError as e:
+        logger.warning(f"Row estimate failed: {str(e)}")
+    return None
+
+
+def _estimate_postgresql(queryset, connection):
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _estimate_sqlite(queryset, connection):
+    # sqlite_stat1 only knows whole-table sizes (filled by ANALYZE)
+    if queryset.query.where:
+        return None
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+        rows = [int(stat.split(" ")[0]) for (stat,) in cursor.fetchall() if stat]
+    return max(rows) if rows else None
@@ -0,0 +1,110 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from main.utils.prefetch import declared_prefetches
+
+
+def parse_field_list(value):
+    """Normalize a ?fields= / ?omit= value (string or parsed list) to a list of names."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+
+def prune_serializer(serializer, fields=None, omit=None):
+    """Drop serializer fields not selected by `fields` or listed in `omit`."""
+    target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    available = target.fields
+
+    unknown = [name for name in (fields or []) + (omit or []) if name not in available]
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+
+    for name in list(available.keys()):
+        if (fields and name not in fields) or (omit and name in omit):
+            available.pop(name)
+    return serializer
+
+
+def prune_data(data, fields=None, omit=None):
+    """Apply a field selection to already serialized data."""
+    return {
+        name: value
+        for name, value in data.items()
+        if (not fields or name in fields) and (not omit or name not in omit)
+    }
+
+
+def narrow_queryset(queryset, serializer):
+    """
+    Restrict a queryset to what the (pruned) serializer reads: only() the
+    model columns behind its fields and drop select/prefetch lookups of
+    relations it no longer renders. Left untouched when a field reads
+    something that cannot be resolved to a column (method fields,
+    properties, source="*").
+    """
+    target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    model = queryset.model
+    columns = {model._meta.pk.name}
+    relations = set()
+    prefetched = declared_prefetches(target)
+
+    for name, field in target.fields.items():
+        if field.write_only or name in prefetched:
+            continue
+        if isinstance(field, serializers.SerializerMethodField) or field.source == "*":
+            return queryset
+        name = field.source.split(".")[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            if name in queryset.query.annotations:
+                continue
+            return queryset
+        if model_field.is_relation:
+            relations.add(name)
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(name)
+        else:
+            columns.add(name)
+
+    prefetches = [
+        lookup
+        for lookup in queryset._prefetch_related_lookups
+        if _lookup_root(lookup) in relations
+    ]
+    queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+
+    select_related = queryset.query.select_related
+    if select_related:
+        if select_related is True:
+            paths = [name for name in relations if name in columns]
+        else:
+            paths = [
+                path
+                for path in _flatten_select_related(select_related)
+                if path.split("__")[0] in relations
+            ]
+        queryset = queryset.select_related(None)
+        if paths:
+            queryset = queryset.select_related(*paths)
+
+    return queryset.only(*columns)
+
+
+def _lookup_root(lookup):
+    path = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+    return path.split("__")[0]
+
+
+def _flatten_select_related(tree, prefix=""):
+    paths = []
+    for name, children in tree.items():
+        path = f"{prefix}{name}"
+        nested = _flatten_select_related(children, f"{path}__") if children else []
+        paths.extend(nested or [path])
+    return paths
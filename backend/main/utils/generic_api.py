@@ -1,15 +1,43 @@
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
 
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.cache import cache
-from django.db.models import Q
+from django.db.models import Max, Q
 from django.core.paginator import Paginator
 from django.db import transaction
 
+from main.utils.pagination import CursorPaginator
+from main.utils.counting import estimate_count, resolve_count_policy
+from main.utils.fieldsets import narrow_queryset, parse_field_list, prune_data, prune_serializer
+from main.utils.prefetch import apply_related_lookups, plan_related_lookups
+from main.utils.metrics import record_cache, timed
+from main.utils.bulk import (
+    preload_related_fields,
+    set_many_to_many,
+    split_many_to_many,
+    touch_auto_now_fields,
+)
+from main.utils.caching import (
+    get_generations,
+    get_or_compute,
+    invalidate_namespace,
+    set_cached,
+    stable_digest,
+)
+from main.utils.conditional import (
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    set_validators,
+)
+
 import json
+import math
 
 
 class GenericView(viewsets.ViewSet):
@@ -20,13 +48,32 @@ class GenericView(viewsets.ViewSet):
     - serializer_class: DRF model serializer class
 
     **Optional attributes**
+    - list_serializer_class: compact serializer for list_actions (default: serializer_class)
+    - list_actions: actions rendered with list_serializer_class (default: ['list', 'leaderboard'])
     - allowed_methods: list of allowed methods (default: ['list', 'retrieve', 'create', 'update', 'delete'])
+      bulk endpoints are opt-in with 'bulk_create', 'bulk_update' and 'bulk_delete'
     - allowed_filter_fields: list of allowed filter fields (default: ['*'])
     - allowed_update_fields: list of allowed update fields (default: ['*'])
     - size_per_request: number of objects to return per request (default: 20)
+    - pagination_mode: "page" (offset pages) or "cursor" (keyset pages) (default: "page")
+    - default_order_by: ordering when the request has no ?order_by=, e.g. "created_at" (default: None)
+    - count_policy: how total_count is computed in page mode (default: "exact")
     - permission_classes: list of permission classes
+    - bulk_permission_classes: checked in addition for bulk writes (default: [IsAuthenticated])
     - cache_key_prefix: cache key prefix
     - cache_duration: cache duration in seconds (default: 1 hour)
+    - cache_stale_duration: seconds an expired entry may still be served while it is recomputed (default: 5 minutes)
+    - cache_tag_fields: fields that scope list caches, e.g. ['book'] (default: [])
+    - cache_dependencies: labels of other models rendered by the serializer, e.g. ['review.review'] (default: [])
+    - conditional_fields: fields whose Max() validates conditional GETs (default: ['updated_at'] when the model has it)
+    - bulk_batch_size: rows per INSERT/UPDATE statement in bulk writes (default: 500)
+    - max_bulk_size: maximum number of objects per bulk request (default: 5000)
+    - leaderboards: named rankings, {name: {"order_by": [...], "filters": {...}}} (default: {})
+    - max_leaderboard_size: largest ?limit= of a leaderboard (default: 100)
+    - auto_prefetch: derive select_related/prefetch_related from the serializer (default: True)
+    - select_related_fields: extra select_related lookups (default: [])
+    - prefetch_related_fields: extra prefetch_related lookups or Prefetch objects (default: [])
+    - max_related_plans: memoized related-lookup plans kept across views (default: 1024)
 
     **API endpoints**
     - GET /: list objects
@@ -34,28 +81,133 @@ class GenericView(viewsets.ViewSet):
     - POST /: create object
     - PUT /<pk>: update object
     - DELETE /<pk>: delete object
+    - POST /bulk/: create a list of objects
+    - PATCH /bulk/: partially update a list of {id, ...} objects
+    - DELETE /bulk/?ids=1,2,3: delete objects
+    - GET /leaderboard/<name>/?limit=<n>: top objects of a leaderboard
+
+    Bulk writes run in one transaction with a single cache invalidation.
+    Invalid items are skipped and reported by index; the valid ones are
+    written (207 when only some items succeeded), ids that are not valid
+    primary keys included. Bulk creates and updates
+    send no model signals, override post_bulk_create / post_bulk_update to
+    react to them.
+
+    **Pagination**
+    - page mode: ?page=<n> or ?top=<n>&bottom=<n>, returns total_count and num_pages
+    - cursor mode: ?cursor=<token>, returns next_cursor and previous_cursor.
+      Enabled per view with pagination_mode = "cursor", or per request by
+      passing ?cursor= (empty for the first page). Ordered by ?order_by=
+      plus the primary key, so deep pages cost the same as the first one.
+
+    **Count policies** (page mode)
+    - exact: COUNT(*) on every request
+    - cached: COUNT(*) memoized per filter set, refreshed on writes
+    - estimated: planner/table statistics, falls back to cached
+    - none: no count; use has_next for infinite scrolling
+    Clients may lower the policy with ?count=<policy> but never raise it.
+
+    **Cache invalidation**
+    List and count keys embed generation counters, so a write invalidates
+    them with a single atomic increment instead of a key scan. Lists
+    filtered on one of cache_tag_fields (e.g. ?book=5) only depend on that
+    tag, so a write to another book leaves them cached.
+
+    Generations are per model, so every view of a model shares them, and a
+    view's keys also embed the generations of its cache_dependencies.
+    Writes bump them (and update object entries) on transaction commit.
+
+    **Conditional GETs**
+    list and retrieve send a weak ETag and answer If-None-Match with 304
+    before anything is serialized. The list validator is the cache
+    generations and the request parameters, plus, when the view does not
+    cache lists (no cache_key_prefix), the Max() of the conditional_fields
+    over the filtered rows; index them. The object validator is its
+    conditional_fields plus the dependency generations. retrieve also
+    answers If-Modified-Since when the view has no cache_dependencies.
+    Lists do not, since a Max(updated_at) cannot see deleted rows.
+
+    **Cache misses**
+    Only one request per key recomputes a missing or expired entry (locked
+    through the cache backend, so across processes when it is shared,
+    see settings.CACHES). Concurrent requests
+    get the stale value, or wait briefly for the fresh one.
+
+    **Leaderboards**
+    Rankings over precomputed, indexed columns (e.g. a denormalized
+    rating), so the top N is an index range read with no GROUP BY or sort.
+    Results are cached per generation like lists, and accept ?fields=.
+
+    **Sparse fieldsets**
+    - ?fields=id,title keeps only the listed serializer fields
+    - ?omit=reviews drops the listed serializer fields
+    The query is narrowed to match: only() the columns behind the kept
+    fields, and no select/prefetch of relations that are not rendered.
+
+    **Related object loading**
+    The serializer tree (after any field selection) is walked to plan
+    select_related for forward foreign keys and prefetch_related for
+    to-many relations, so a page renders in a constant number of queries.
+    Method fields are opaque: list what they touch in select_related_fields
+    or prefetch_related_fields.
 
     **Features**
     - Pagination
     - Filtering
     - Caching
     - CRUD operations
+    - Request metrics (serializer time and cache events, see main.middleware)
     """
 
     queryset = None  # the model queryset
     serializer_class = None  # DRF model serializer class
+    list_serializer_class = None  # compact serializer for collections
+    list_actions = ["list", "leaderboard"]  # actions using list_serializer_class
     size_per_request = 20  # number of objects to return per request
     permission_classes = []  # list of permission classes
     allowed_methods = ["list", "create", "retrieve", "update", "delete"]
     allowed_filter_fields = ["*"]  # list of allowed filter fields
     allowed_update_fields = ["*"]  # list of allowed update fields
+    pagination_mode = "page"  # "page" or "cursor"
+    default_order_by = None  # ordering without ?order_by=
+    count_policy = "exact"  # "exact", "cached", "estimated" or "none"
+    control_params = [  # never treated as filters
+        "page", "top", "bottom", "order_by", "cursor", "count", "fields", "omit",
+    ]
 
     cache_key_prefix = None  # cache key prefix
     cache_duration = 60 * 60  # cache duration in seconds
+    cache_stale_duration = 5 * 60  # stale-while-revalidate window in seconds
+    count_cache_duration = 5 * 60  # cached count duration in seconds
+    cache_tag_fields = []  # fields that scope list caches
+    cache_dependencies = []  # labels of related models rendered by the serializer
+    conditional_fields = None  # fields validating conditional GETs, None for updated_at
+
+    bulk_permission_classes = [IsAuthenticated]  # required on top of permission_classes for bulk writes
+    bulk_batch_size = 500  # rows per bulk statement
+    max_bulk_size = 5000  # objects per bulk request
+
+    leaderboards = {}  # name -> {"order_by": [...], "filters": {...}}
+    max_leaderboard_size = 100  # largest leaderboard page
+
+    auto_prefetch = True  # plan related lookups from the serializer
+    select_related_fields = []  # extra select_related lookups
+    prefetch_related_fields = []  # extra prefetch_related lookups
+
+    _related_plans = {}  # planned lookups per view, serializer and field selection
+    max_related_plans = 1024  # plans kept before the memo is reset
 
     def __init__(self):
         if self.queryset is None or not self.serializer_class:
             raise NotImplementedError("queryset and serializer_class must be defined")
+        self.selected_fields = None
+        self.omitted_fields = None
+
+    def get_permissions(self):
+        permissions = super().get_permissions()
+        if getattr(self, "action", None) in ("bulk_create", "bulk_update", "bulk_delete"):
+            permissions += [permission() for permission in self.bulk_permission_classes]
+        return permissions
 
     # CRUD operations
     def list(self, request):
@@ -64,17 +216,48 @@ class GenericView(viewsets.ViewSet):
         self.initialize_queryset(request)
         try:
             filters, excludes = self.parse_query_params(request)
+            cursor = filters.pop("cursor", None)
+            self.selected_fields = parse_field_list(filters.pop("fields", None))
+            self.omitted_fields = parse_field_list(filters.pop("omit", None))
+            count_policy = resolve_count_policy(self.count_policy, filters.pop("count", None))
             top, bottom, order_by = self.get_pagination_params(filters)
+            use_cursor = self.pagination_mode == "cursor" or cursor is not None
+
+            selection = self.get_selection_params()
+            if use_cursor:
+                window = {"order_by": order_by, "cursor": cursor or "", **selection}
+
+                def compute():
+                    return self.get_cursor_list_data(request, filters, excludes, cursor, order_by)
+            else:
+                window = {
+                    "top": top,
+                    "bottom": bottom,
+                    "order_by": order_by,
+                    "count_policy": count_policy,
+                    **selection,
+                }
+
+                def compute():
+                    return self.get_list_data(
+                        request, filters, excludes, top, bottom, order_by, count_policy
+                    )
+
+            etag = self.get_list_etag(filters, excludes, window)
+            if etag and is_not_modified(request, etag):
+                return not_modified_response(etag)
 
-            cached_data = None
             if self.cache_key_prefix:
-                cache_key = self.get_list_cache_key(filters, excludes, top, bottom)
-                cached_data = cache.get(cache_key)
-            if cached_data:
-                return Response(cached_data, status=status.HTTP_200_OK)
+                cache_key = self.get_list_cache_key(filters, excludes, **window)
+                data = get_or_compute(
+                    cache_key, compute, self.cache_duration, self.cache_stale_duration
+                )
+            else:
+                data = compute()
 
-            return self.filter(request, filters, excludes, top, bottom, order_by)
-        except ValidationError as e:
+            response = Response(data, status=status.HTTP_200_OK)
+            return set_validators(response, etag) if etag else response
+        except (ValueError, ValidationError) as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def retrieve(self, request, pk=None):
@@ -83,16 +266,39 @@ class GenericView(viewsets.ViewSet):
 
         self.initialize_queryset(request)
 
-        cached_object = None
-        if self.cache_key_prefix:
-            cache_key = self.get_object_cache_key(pk)
-            cached_object = cache.get(cache_key)
-        if cached_object:
-            return Response(cached_object, status=status.HTTP_200_OK)
+        self.selected_fields = parse_field_list(request.query_params.get("fields"))
+        self.omitted_fields = parse_field_list(request.query_params.get("omit"))
+        if self.selected_fields or self.omitted_fields:
+            try:
+                self.build_serializer()
+            except ValidationError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag, last_modified = self.get_object_validators(pk)
+        if etag and is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        if self.selected_fields or self.omitted_fields:
+            # Sparse objects are cut from the cached full object when there is one
+            cached = cache.get(self.get_object_cache_key(pk)) if self.cache_key_prefix else None
+            if self.cache_key_prefix:
+                record_cache("miss" if cached is None else "hit")
+            if cached is not None:
+                object = prune_data(cached["value"], self.selected_fields, self.omitted_fields)
+            else:
+                object = self.get_serialized_object(pk)
+        elif self.cache_key_prefix:
+            object = get_or_compute(
+                self.get_object_cache_key(pk),
+                lambda: self.get_serialized_object(pk),
+                self.cache_duration,
+                self.cache_stale_duration,
+            )
+        else:
+            object = self.get_serialized_object(pk)
 
-        object = self.get_serialized_object(pk)
-        self.cache_object(object, pk)
-        return Response(object, status=status.HTTP_200_OK)
+        response = Response(object, status=status.HTTP_200_OK)
+        return set_validators(response, etag, last_modified) if etag else response
 
     @transaction.atomic
     def create(self, request):
@@ -107,7 +313,7 @@ class GenericView(viewsets.ViewSet):
         if serializer.is_valid():
             instance = serializer.save()
             self.cache_object(serializer.data, instance.pk)
-            self.invalidate_list_cache()
+            self.invalidate_list_cache(instance)
 
             self.post_create(request, instance)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -121,6 +327,7 @@ class GenericView(viewsets.ViewSet):
         self.initialize_queryset(request)
 
         instance = get_object_or_404(self.queryset, pk=pk)
+        previous_tags = self.get_instance_cache_tags(instance)
         self.pre_update(request, instance)
 
         if "*" not in self.allowed_update_fields:
@@ -135,7 +342,7 @@ class GenericView(viewsets.ViewSet):
         if serializer.is_valid():
             serializer.save()
             self.cache_object(serializer.data, pk)
-            self.invalidate_list_cache()
+            self.invalidate_list_cache(instance, previous_tags)
 
             self.post_update(request, instance)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -150,7 +357,7 @@ class GenericView(viewsets.ViewSet):
 
         instance = get_object_or_404(self.queryset, pk=pk)
         self.delete_cache(pk)
-        self.invalidate_list_cache()
+        self.invalidate_list_cache(instance)
         self.pre_destroy(instance)
         if hasattr(instance, "removed"):
             instance.removed = True
@@ -161,6 +368,232 @@ class GenericView(viewsets.ViewSet):
         self.post_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    # Bulk operations
+    @transaction.atomic
+    def bulk_create(self, request):
+        if "bulk_create" not in self.allowed_methods:
+            return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        self.initialize_queryset(request)
+
+        items, error = self.get_bulk_items(request)
+        if error:
+            return error
+
+        model = self.queryset.model
+        serializer = self.serializer_class(context={"request": request})
+        preload_related_fields(serializer, items)
+
+        instances, many_to_many, errors = [], [], []
+        for index, item in enumerate(items):
+            try:
+                validated_data = dict(serializer.run_validation(item))
+            except ValidationError as e:
+                errors.append({"index": index, "errors": e.detail})
+                continue
+            many_to_many.append(split_many_to_many(model, validated_data))
+            instances.append(self.build_bulk_instance(request, validated_data))
+
+        created = model.objects.bulk_create(instances, batch_size=self.bulk_batch_size)
+        set_many_to_many(model, created, many_to_many)
+        if created:
+            self.invalidate_list_cache()
+            self.post_bulk_create(request, created)
+
+        data = {"created": [instance.pk for instance in created], "errors": errors}
+        return Response(data, status=self.get_bulk_status(created, errors, status.HTTP_201_CREATED))
+
+    @transaction.atomic
+    def bulk_update(self, request):
+        if "bulk_update" not in self.allowed_methods:
+            return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        self.initialize_queryset(request)
+
+        items, error = self.get_bulk_items(request)
+        if error:
+            return error
+
+        model = self.queryset.model
+        pks, errors = self.parse_bulk_ids(
+            [item.get("id") if isinstance(item, dict) else None for item in items]
+        )
+        existing = self.queryset.in_bulk(set(pks.values()))
+        serializer = self.serializer_class(context={"request": request}, partial=True)
+        preload_related_fields(serializer, items)
+
+        invalid = {error["index"] for error in errors}
+        updated, fields = [], set()
+        for index, item in enumerate(items):
+            if index in invalid:
+                continue
+            instance = existing.get(pks.get(index))
+            if instance is None:
+                errors.append({"index": index, "errors": {"id": ["Object not found"]}})
+                continue
+
+            disallowed = [
+                field
+                for field in item.keys()
+                if field != "id"
+                and "*" not in self.allowed_update_fields
+                and field not in self.allowed_update_fields
+            ]
+            if disallowed:
+                errors.append(
+                    {"index": index, "errors": {f: ["Field is not allowed to update"] for f in disallowed}}
+                )
+                continue
+
+            try:
+                self.pre_update(request, instance)
+                serializer.instance = instance
+                validated_data = dict(serializer.run_validation(item))
+            except (ValidationError, PermissionDenied) as e:
+                errors.append({"index": index, "errors": e.detail})
+                continue
+
+            for name, related in split_many_to_many(model, validated_data).items():
+                getattr(instance, name).set(related)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+            updated.append(instance)
+
+        if updated:
+            fields.update(touch_auto_now_fields(model, updated))
+            if fields:
+                model.objects.bulk_update(updated, list(fields), batch_size=self.bulk_batch_size)
+            self.delete_cache_many([instance.pk for instance in updated])
+            self.invalidate_list_cache()
+            self.post_bulk_update(request, updated)
+
+        errors.sort(key=lambda error: error["index"])
+        data = {"updated": [instance.pk for instance in updated], "errors": errors}
+        return Response(data, status=self.get_bulk_status(updated, errors, status.HTTP_200_OK))
+
+    @transaction.atomic
+    def bulk_delete(self, request):
+        if "bulk_delete" not in self.allowed_methods:
+            return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        self.initialize_queryset(request)
+
+        ids = parse_field_list(request.query_params.get("ids")) or []
+        if not ids:
+            return Response({"error": "ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_bulk_size:
+            return Response(
+                {"error": f"At most {self.max_bulk_size} objects per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        valid, errors = self.parse_bulk_ids(ids)
+        instances = list(self.queryset.filter(pk__in=set(valid.values())))
+
+        for instance in instances:
+            self.pre_destroy(instance)
+
+        model = self.queryset.model
+        pks = [instance.pk for instance in instances]
+        if any(field.name == "removed" for field in model._meta.concrete_fields):
+            model._default_manager.filter(pk__in=pks).update(removed=True)
+        else:
+            model._default_manager.filter(pk__in=pks).delete()
+
+        for instance in instances:
+            self.post_destroy(instance)
+        if pks:
+            self.delete_cache_many(pks)
+            self.invalidate_list_cache()
+
+        found = set(pks)
+        data = {
+            "deleted": pks,
+            "not_found": [ids[index] for index, pk in valid.items() if pk not in found],
+            "errors": errors,
+        }
+        return Response(data, status=self.get_bulk_status(pks, errors, status.HTTP_200_OK))
+
+    def leaderboard(self, request, board=None):
+        if "leaderboard" not in self.allowed_methods:
+            return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+        if board not in self.leaderboards:
+            return Response({"error": f"Unknown leaderboard {board}"}, status=status.HTTP_404_NOT_FOUND)
+
+        self.initialize_queryset(request)
+        try:
+            default_limit = min(self.size_per_request, self.max_leaderboard_size)
+            limit = int(request.query_params.get("limit", default_limit))
+            if not 0 < limit <= self.max_leaderboard_size:
+                raise ValidationError(f"limit must be between 1 and {self.max_leaderboard_size}")
+            self.selected_fields = parse_field_list(request.query_params.get("fields"))
+            self.omitted_fields = parse_field_list(request.query_params.get("omit"))
+            self.build_serializer()
+        except (ValueError, ValidationError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = self.get_list_cache_key(
+            {}, {}, leaderboard=board, limit=limit, **self.get_selection_params()
+        )
+        data = get_or_compute(
+            cache_key,
+            lambda: self.get_leaderboard_data(board, limit),
+            self.cache_duration,
+            self.cache_stale_duration,
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
+    def get_leaderboard_data(self, board, limit):
+        config = self.leaderboards[board]
+        queryset = self.queryset.filter(**config.get("filters", {}))
+        queryset = self.prepare_queryset(queryset).order_by(*config["order_by"])[:limit]
+        serializer = self.build_serializer(list(queryset), many=True)
+        with timed("serialize"):
+            objects = serializer.data
+        return {"leaderboard": board, "objects": objects}
+
+    def get_bulk_items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return None, Response(
+                {"error": "Expected a list of objects"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.max_bulk_size:
+            return None, Response(
+                {"error": f"At most {self.max_bulk_size} objects per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return items, None
+
+    def parse_bulk_ids(self, ids):
+        """
+        Convert ids with the primary key field. Returns {index: pk} and an
+        error per invalid id; missing (None) ids are left out of both.
+        """
+        pk_field = self.queryset.model._meta.pk
+        pks, errors = {}, []
+        for index, pk in enumerate(ids):
+            if pk is None:
+                continue
+            try:
+                pk = pk_field.to_python(pk)
+                pk_field.run_validators(pk)  # in range of the column
+                pks[index] = pk
+            except DjangoValidationError as e:
+                errors.append({"index": index, "errors": {"id": e.messages}})
+        return pks, errors
+
+    def get_bulk_status(self, written, errors, success_status):
+        if not errors:
+            return success_status
+        if not written:
+            return status.HTTP_400_BAD_REQUEST
+        return status.HTTP_207_MULTI_STATUS
+
+    def build_bulk_instance(self, request, validated_data):
+        return self.queryset.model(**validated_data)
+
     # Middleware methods
     def pre_create(self, request):
         pass
@@ -180,33 +613,169 @@ class GenericView(viewsets.ViewSet):
     def post_destroy(self, instance):
         pass
 
-    # Cache operations
+    # bulk_create and bulk_update send no model signals
+    def post_bulk_create(self, request, instances):
+        pass
+
+    def post_bulk_update(self, request, instances):
+        pass
+
+    # Cache operations (applied once the surrounding transaction commits)
     def delete_cache(self, pk):
         if not self.cache_key_prefix:
             return
         cache_key = self.get_object_cache_key(pk)
-        cache.delete(cache_key)
+        transaction.on_commit(lambda: cache.delete(cache_key))
 
-    def invalidate_list_cache(self):
+    def delete_cache_many(self, pks):
         if not self.cache_key_prefix:
             return
-        cache.delete_pattern(f"{self.cache_key_prefix}_list_*")
+        cache_keys = [self.get_object_cache_key(pk) for pk in pks]
+        transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+    def invalidate_list_cache(self, instance=None, extra_tags=()):
+        """
+        Invalidate cached lists and counts. Without an instance every list
+        of the view is dropped; with one, only unscoped lists and lists
+        scoped to the instance's tags are.
+        """
+        if instance is None:
+            invalidate_namespace(self.get_cache_namespace())
+            return
+        tags = set(self.get_instance_cache_tags(instance)) | set(extra_tags)
+        invalidate_namespace(self.get_cache_namespace(), tags)
 
     def cache_object(self, object_data, pk):
         if not self.cache_key_prefix:
             return
         cache_key = self.get_object_cache_key(pk)
-        cache.set(cache_key, object_data, self.cache_duration)
+        transaction.on_commit(
+            lambda: set_cached(cache_key, object_data, self.cache_duration, self.cache_stale_duration)
+        )
 
     def get_object_cache_key(self, pk):
+        # Objects rendering related models expire with their generations, like lists
+        namespaces = self.get_dependency_namespaces()
+        if namespaces:
+            generations = ".".join(str(g) for g in get_generations(namespaces))
+            return f"{self.cache_key_prefix}_object_{pk}_{generations}"
         return f"{self.cache_key_prefix}_object_{pk}"
 
-    def get_list_cache_key(self, filters, excludes, top, bottom):
+    def get_cache_key_prefix(self):
+        # Leaderboards are cached even without a prefix, keyed per view class
+        return self.cache_key_prefix or f"{self.get_cache_namespace()}:{type(self).__name__}"
+
+    def get_list_cache_key(self, filters, excludes, top=None, bottom=None, **window):
+        """
+        Build a list cache key shared by every worker process: the filters,
+        excludes and page window (top/bottom, order_by, cursor, count policy)
+        are canonicalized and hashed with a stable digest.
+        """
+        params = {
+            "filters": filters,
+            "excludes": excludes,
+            "top": top,
+            "bottom": bottom,
+            **{name: value for name, value in window.items() if value is not None},
+        }
+        return (
+            f"{self.get_cache_key_prefix()}_list_{self.get_list_generation(filters)}_"
+            f"{stable_digest(params)}"
+        )
+
+    def get_count_cache_key(self, filters, excludes):
         return (
-            f"{self.cache_key_prefix}_list_{hash(frozenset(filters.items()))}_"
-            f"{hash(frozenset(excludes.items()))}_{top}_{bottom}"
+            f"{self.get_cache_namespace()}_count_{self.get_list_generation(filters)}_"
+            f"{stable_digest(filters, excludes)}"
+        )
+
+    def get_selection_params(self):
+        """The field selection as sorted, deduplicated lists, for cache keys and ETags."""
+        return {
+            "fields": sorted(set(self.selected_fields)) if self.selected_fields else None,
+            "omit": sorted(set(self.omitted_fields)) if self.omitted_fields else None,
+        }
+
+    def get_cache_namespace(self):
+        return self.queryset.model._meta.label_lower
+
+    def get_list_generation(self, filters):
+        namespace = self.get_cache_namespace()
+        tags = self.get_filter_cache_tags(filters)
+        scopes = [f"{namespace}:{tag}" for tag in tags] or [f"{namespace}:all"]
+        namespaces = [namespace] + scopes + self.get_dependency_namespaces()
+        return ".".join(str(g) for g in get_generations(namespaces))
+
+    def get_dependency_namespaces(self):
+        namespaces = []
+        for label in self.cache_dependencies:
+            namespaces += [label, f"{label}:all"]
+        return namespaces
+
+    # Conditional requests
+    def get_conditional_fields(self):
+        if self.conditional_fields is not None:
+            return self.conditional_fields
+        model = self.queryset.model
+        return ["updated_at"] if any(f.name == "updated_at" for f in model._meta.fields) else []
+
+    def get_conditional_values(self, queryset):
+        fields = self.get_conditional_fields()
+        aggregates = {f"max_{i}": Max(field) for i, field in enumerate(fields)}
+        values = queryset.aggregate(**aggregates)
+        return [values[f"max_{i}"] for i in range(len(fields))]
+
+    def get_list_etag(self, filters, excludes, window):
+        generation = self.get_list_generation(filters)
+        if self.cache_key_prefix:
+            # The cached list is keyed by these generations, so they validate
+            # it as well as its content would, without a query
+            return make_etag(generation, filters, excludes, window)
+        if not self.get_conditional_fields():
+            return None
+        return make_etag(
+            generation,
+            self.get_conditional_values(self.filter_queryset(filters, excludes)),
+            filters,
+            excludes,
+            window,
         )
 
+    def get_object_validators(self, pk):
+        if not self.get_conditional_fields():
+            return None, None
+        model = self.queryset.model
+        try:
+            values = self.get_conditional_values(model._default_manager.filter(pk=pk))
+        except (TypeError, ValueError):
+            return None, None
+        if values[0] is None:
+            return None, None  # missing object, let retrieve answer 404
+
+        generations = get_generations(self.get_dependency_namespaces())
+        etag = make_etag(pk, values, generations, self.get_selection_params())
+        timestamps = [value.timestamp() for value in values if hasattr(value, "timestamp")]
+        return etag, max(timestamps) if timestamps and not generations else None
+
+    def get_filter_cache_tags(self, filters):
+        tags = []
+        for field in self.cache_tag_fields:
+            for lookup in (field, f"{field}_id", f"{field}__id", f"{field}__pk"):
+                value = filters.get(lookup)
+                if isinstance(value, (int, str)) and not isinstance(value, bool):
+                    tags.append(f"{field}:{value}")
+                    break
+        return tags
+
+    def get_instance_cache_tags(self, instance):
+        tags = []
+        for field in self.cache_tag_fields:
+            attname = instance._meta.get_field(field).attname
+            value = getattr(instance, attname, None)
+            if value is not None:
+                tags.append(f"{field}:{value}")
+        return tags
+
     # Helper methods
     def parse_query_params(self, request):
         filters = {}
@@ -225,7 +794,9 @@ class GenericView(viewsets.ViewSet):
                 return value  # Return as plain string if not valid JSON
 
         for key, value in request.query_params.items():
-            if key.startswith("exclude__"):
+            if key in self.control_params:
+                filters[key] = value if key == "cursor" else parse_value(value)
+            elif key.startswith("exclude__"):
                 parsed_value = parse_value(value)
                 excludes[key[9:]] = parsed_value
             else:
@@ -239,15 +810,24 @@ class GenericView(viewsets.ViewSet):
         return filters, excludes
 
     def get_pagination_params(self, filters):
+        def parse_position(name, value, minimum):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValidationError(f"{name} must be an integer")
+            if value < minimum:
+                raise ValidationError(f"{name} must be at least {minimum}")
+            return value
+
         page = filters.pop("page", None)
-        top = int(filters.pop("top", 0))
-        order_by = filters.pop("order_by", None)
+        top = parse_position("top", filters.pop("top", 0), 0)
+        order_by = filters.pop("order_by", None) or self.default_order_by
 
         if page is not None:
-            top = (int(page) - 1) * self.size_per_request
+            top = (parse_position("page", page, 1) - 1) * self.size_per_request
         bottom = filters.pop("bottom", None)
         if bottom:
-            bottom = int(bottom)
+            bottom = parse_position("bottom", bottom, top)
         else:
             bottom = top + self.size_per_request
         return top, bottom, order_by
@@ -258,32 +838,132 @@ class GenericView(viewsets.ViewSet):
         
         return self.queryset.filter(filter_q).exclude(exclude_q)
 
-    def filter(self, request, filters, excludes, top, bottom, order_by=None):
-        queryset = self.filter_queryset(filters, excludes)
+    def get_list_data(self, request, filters, excludes, top, bottom, order_by=None, count_policy=None):
+        queryset = self.prepare_queryset(self.filter_queryset(filters, excludes))
 
         if order_by:
             queryset = queryset.order_by(order_by)
 
-        paginator = Paginator(queryset, self.size_per_request)
+        count_policy = count_policy or self.count_policy
         page_number = (top // self.size_per_request) + 1
-        page = paginator.get_page(page_number)
 
-        serializer = self.serializer_class(page, many=True)
-        data = {
-            "objects": serializer.data,
-            "total_count": paginator.count,
-            "num_pages": paginator.num_pages,
-            "current_page": page.number,
+        if count_policy == "exact":
+            paginator = Paginator(queryset, self.size_per_request)
+            page = paginator.get_page(page_number)
+            objects = page
+            total_count = paginator.count
+            num_pages = paginator.num_pages
+            page_number = page.number
+            has_next = page.has_next()
+        else:
+            # Fetch one extra row to know whether a next page exists
+            offset = (page_number - 1) * self.size_per_request
+            objects = list(queryset[offset : offset + self.size_per_request + 1])
+            has_next = len(objects) > self.size_per_request
+            objects = objects[: self.size_per_request]
+            total_count = self.get_total_count(queryset, filters, excludes, count_policy)
+            num_pages = (
+                max(1, math.ceil(total_count / self.size_per_request))
+                if total_count is not None
+                else None
+            )
+
+        serializer = self.build_serializer(objects, many=True)
+        with timed("serialize"):
+            objects = serializer.data
+        return {
+            "objects": objects,
+            "total_count": total_count,
+            "num_pages": num_pages,
+            "current_page": page_number,
+            "has_next": has_next,
+            "count_policy": count_policy,
         }
 
-        cache_key = self.get_list_cache_key(filters, excludes, top, bottom)
-        cache.set(cache_key, data, self.cache_duration)
-
-        return Response(data, status=status.HTTP_200_OK)
+    def get_total_count(self, queryset, filters, excludes, count_policy):
+        if count_policy == "none":
+            return None
+        if count_policy == "estimated":
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                return estimate
+        if count_policy in ("estimated", "cached"):
+            return get_or_compute(
+                self.get_count_cache_key(filters, excludes),
+                queryset.count,
+                self.count_cache_duration,
+                self.cache_stale_duration,
+            )
+        return queryset.count()
+
+    def get_cursor_list_data(self, request, filters, excludes, cursor, order_by=None):
+        queryset = self.prepare_queryset(self.filter_queryset(filters, excludes))
+
+        paginator = CursorPaginator(queryset, order_by, self.size_per_request)
+        objects, next_cursor, previous_cursor = paginator.get_page(cursor)
+
+        serializer = self.build_serializer(objects, many=True)
+        with timed("serialize"):
+            objects = serializer.data
+        return {
+            "objects": objects,
+            "next_cursor": next_cursor,
+            "previous_cursor": previous_cursor,
+        }
 
     def get_serialized_object(self, pk):
-        instance = get_object_or_404(self.queryset, pk=pk)
-        return self.serializer_class(instance).data
+        instance = get_object_or_404(self.prepare_queryset(self.queryset), pk=pk)
+        with timed("serialize"):
+            return self.build_serializer(instance).data
+
+    def get_serializer_class(self):
+        if self.list_serializer_class and getattr(self, "action", None) in self.list_actions:
+            return self.list_serializer_class
+        return self.serializer_class
+
+    def build_serializer(self, instance=None, many=False):
+        serializer = self.get_serializer_class()(instance, many=many)
+        if self.selected_fields or self.omitted_fields:
+            prune_serializer(serializer, self.selected_fields, self.omitted_fields)
+        return serializer
+
+    def prepare_queryset(self, queryset):
+        """Apply the field selection and the related-object loading plan."""
+        return self.apply_related_plan(self.apply_field_selection(queryset))
+
+    def apply_field_selection(self, queryset):
+        if not (self.selected_fields or self.omitted_fields):
+            return queryset
+        return narrow_queryset(queryset, self.build_serializer(many=True))
+
+    def apply_related_plan(self, queryset):
+        select_related, prefetch_related = self.get_related_plan()
+        return apply_related_lookups(queryset, select_related, prefetch_related)
+
+    def get_related_plan(self):
+        # Views sharing a serializer may differ in their extra lookups, and the
+        # selection is a set so reordered or repeated names reuse one plan
+        plan_key = (
+            type(self),
+            self.get_serializer_class(),
+            frozenset(self.selected_fields or ()),
+            frozenset(self.omitted_fields or ()),
+        )
+        plan = self._related_plans.get(plan_key)
+        if plan is None:
+            select_related, prefetch_related = [], []
+            if self.auto_prefetch:
+                select_related, prefetch_related = plan_related_lookups(
+                    self.build_serializer(many=True), self.queryset.model
+                )
+            plan = (
+                select_related + list(self.select_related_fields),
+                list(self.prefetch_related_fields) + prefetch_related,
+            )
+            if len(self._related_plans) >= self.max_related_plans:
+                self._related_plans.clear()
+            self._related_plans[plan_key] = plan
+        return plan
 
     def initialize_queryset(self, request):
         pass
@@ -0,0 +1,142 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connections
+
+_current_metrics = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    # RequestMetrics
+    Per-request counters collected by RequestMetricsMiddleware and the
+    GenericView hooks.
+
+    **Fields**
+    - queries / db_time: SQL statements executed and their total time (s)
+    - timings: named phases such as "serialize", excluding their DB time
+    - cache: cache events ("hit", "stale", "miss", "set")
+
+    Queries also count towards the enclosing metrics (`parent`), so a test's
+    assert_max_queries still sees the queries of the requests it makes.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings = defaultdict(float)
+        self.cache = Counter()
+        self.started = perf_counter()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            metrics = self
+            while metrics is not None:
+                metrics.queries += 1
+                metrics.db_time += elapsed
+                metrics = metrics.parent
+
+    @property
+    def total_time(self):
+        return perf_counter() - self.started
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            *(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings.items()),
+            f'cache;desc="{self.format_cache()}"',
+            f"total;dur={self.total_time * 1000:.1f}",
+        ]
+        return ", ".join(entries)
+
+    def format_cache(self):
+        return " ".join(f"{event}={count}" for event, count in sorted(self.cache.items())) or "none"
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 1),
+            **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self.timings.items()},
+            "cache": dict(self.cache),
+            "total_ms": round(self.total_time * 1000, 1),
+        }
+
+
+def current_metrics():
+    return _current_metrics.get()
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = current_metrics()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.execute_wrapper(execute, sql, params, many, context)
+
+
+def track_queries():
+    """
+    Report the queries of the calling thread's connections to the current
+    metrics from now on. Connections are per thread, and under ASGI a sync
+    view queries from a worker thread instead of the event loop's, so this
+    runs wherever queries are expected. Calling it again is a no-op.
+    """
+    for alias in connections:
+        wrappers = connections[alias].execute_wrappers
+        if _record_query not in wrappers:
+            wrappers.append(_record_query)
+
+
+@contextmanager
+def collect_metrics():
+    """Collect metrics for the enclosed block, including the queries of the calling thread."""
+    metrics = RequestMetrics(parent=current_metrics())
+    token = _current_metrics.set(metrics)
+    try:
+        track_queries()
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Add the enclosed block's time, minus its DB time, to the current metrics."""
+    metrics = current_metrics()
+    if metrics is None:
+        yield
+        return
+    start, db_start = perf_counter(), metrics.db_time
+    try:
+        yield
+    finally:
+        metrics.timings[name] += (perf_counter() - start) - (metrics.db_time - db_start)
+
+
+def record_cache(event, count=1):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.cache[event] += count
+
+
+@contextmanager
+def assert_max_queries(limit, label="Block"):
+    """
+    Test helper failing when the enclosed block runs more than `limit`
+    queries, e.g.
+
+        with assert_max_queries(6, "BookView.list"):
+            client.get("/api/v1/book/")
+    """
+    with collect_metrics() as metrics:
+        yield metrics
+    if metrics.queries > limit:
+        raise AssertionError(
+            f"{label} ran {metrics.queries} queries, expected at most {limit}"
+        )
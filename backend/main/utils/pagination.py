@@ -0,0 +1,236 @@
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+from rest_framework.exceptions import ValidationError
+
+
+class CursorPaginator:
+    """
+    # CursorPaginator
+    Keyset pagination over a queryset. Rows are ordered by the requested
+    fields plus the primary key as a tie-breaker, and each page is fetched
+    with a `WHERE (fields, pk) > (last row)` condition instead of an OFFSET,
+    so every page costs the same as the first one.
+
+    **Cursor format**
+    - Opaque url-safe base64 token holding the direction, the ordering it
+      was issued for and the ordering values of the boundary row.
+    - NULL values always sort last when paging forward.
+    - Foreign keys are ordered by their column (created_by -> created_by_id).
+      To-many relations have no single value per row and are rejected, as
+      are values a cursor cannot hold, with a ValidationError.
+
+    Non-nullable model fields are ordered and compared without NULL
+    handling, so an index on (filter columns, ordering columns) serves
+    both the sort and the seek to the cursor.
+    """
+
+    def __init__(self, queryset, order_by, size):
+        self.queryset = queryset
+        self.ordering = [
+            (self.resolve_field(name), descending) for name, descending in self.parse_ordering(order_by)
+        ]
+        self.size = size
+        self.nullable = {name: self.is_nullable(name) for name, _ in self.ordering}
+
+    @staticmethod
+    def parse_ordering(order_by):
+        if not order_by:
+            fields = []
+        elif isinstance(order_by, str):
+            fields = [f.strip() for f in order_by.split(",") if f.strip()]
+        else:
+            fields = [str(f).strip() for f in order_by]
+
+        ordering = []
+        for field in fields:
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            if name in ("pk", "id"):
+                ordering.append(("pk", descending))
+                return ordering
+            ordering.append((name, descending))
+
+        # Always finish with the pk so the ordering is total and stable
+        ordering.append(("pk", ordering[-1][1] if ordering else False))
+        return ordering
+
+    def get_page(self, cursor=None):
+        reverse, values = False, None
+        if cursor:
+            reverse, values = self.decode_cursor(cursor)
+
+        queryset = self.queryset.order_by(*self.order_expressions(reverse))
+        if values is not None:
+            queryset = queryset.filter(self.keyset_q(values, reverse))
+
+        rows = list(queryset[: self.size + 1])
+        has_more = len(rows) > self.size
+        rows = rows[: self.size]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = values is not None if not reverse else has_more
+
+        next_cursor = None
+        previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], reverse=False)
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], reverse=True)
+        return rows, next_cursor, previous_cursor
+
+    # Ordering helpers
+    def resolve_field(self, name):
+        """Path of the column holding `name`'s value, for a foreign key its attname."""
+        model, parts = self.queryset.model, name.split("__")
+        for position, part in enumerate(parts):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return name  # pk, annotations and transforms
+            if not field.is_relation:
+                return name
+            if field.many_to_many or field.one_to_many or not field.concrete:
+                raise ValidationError(f"Cannot paginate with a cursor ordered by {name}")
+            if position == len(parts) - 1:
+                parts[position] = field.attname
+                return "__".join(parts)
+            model = field.related_model
+        return name
+
+    def is_nullable(self, name):
+        if name == "pk":
+            return False
+        try:
+            return self.queryset.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return True  # annotations and related paths may be NULL
+
+    def order_expressions(self, reverse=False):
+        # Paging backwards walks the reversed ordering, so NULLs come first
+        nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+        expressions = []
+        for name, descending in self.ordering:
+            options = nulls if self.nullable[name] else {}
+            if descending != reverse:
+                expressions.append(F(name).desc(**options))
+            else:
+                expressions.append(F(name).asc(**options))
+        return expressions
+
+    def keyset_q(self, values, reverse=False):
+        """Build the condition selecting rows strictly after (or before) `values`."""
+        condition = None
+        equal = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            if not self.nullable[name]:
+                lookup = "lt" if descending != reverse else "gt"
+                step = Q(**{f"{name}__{lookup}": value})
+                same = Q(**{name: value})
+            elif value is None:
+                # NULLs sort last: only non-NULL rows precede them
+                step = Q(**{f"{name}__isnull": False}) if reverse else None
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                lookup = "lt" if descending != reverse else "gt"
+                step = Q(**{f"{name}__{lookup}": value})
+                if not reverse:
+                    step |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+
+            if step is not None:
+                clause = equal & step
+                condition = clause if condition is None else condition | clause
+            equal &= same
+
+        if condition is None:
+            return Q(pk__in=[])
+        first, descending = self.ordering[0]
+        if not self.nullable[first] and values[0] is not None:
+            # Redundant inclusive bound on the leading column, lets the
+            # database seek to the cursor instead of filtering from the start
+            lookup = "lte" if descending != reverse else "gte"
+            condition = Q(**{f"{first}__{lookup}": values[0]}) & condition
+        return condition
+
+    # Cursor encoding
+    def row_values(self, row):
+        values = []
+        for name, _ in self.ordering:
+            value = row
+            for attr in name.split("__"):
+                value = getattr(value, attr, None)
+                if value is None:
+                    break
+            values.append(value)
+        return values
+
+    def encode_cursor(self, row, reverse=False):
+        payload = {
+            "d": "p" if reverse else "n",
+            "o": self.ordering_signature(),
+            "v": [],
+        }
+        for (name, _), value in zip(self.ordering, self.row_values(row)):
+            try:
+                payload["v"].append(self.encode_value(value))
+            except TypeError:
+                raise ValidationError(f"Cannot paginate with a cursor ordered by {name}")
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(str(cursor) + "=" * (-len(str(cursor)) % 4))
+            payload = json.loads(raw)
+            if payload["o"] != self.ordering_signature():
+                raise ValueError("cursor was issued for a different ordering")
+            values = [self.decode_value(v) for v in payload["v"]]
+            if len(values) != len(self.ordering):
+                raise ValueError("cursor does not match the ordering")
+            if any(v is None and not self.nullable[name] for (name, _), v in zip(self.ordering, values)):
+                raise ValueError("cursor has NULL for a non-nullable field")
+            return payload["d"] == "p", values
+        except (ValueError, KeyError, TypeError):
+            raise ValidationError("Invalid cursor")
+
+    def ordering_signature(self):
+        return ",".join(f"-{name}" if descending else name for name, descending in self.ordering)
+
+    @staticmethod
+    def encode_value(value):
+        if isinstance(value, datetime):
+            return {"dt": value.isoformat()}
+        if isinstance(value, date):
+            return {"d": value.isoformat()}
+        if isinstance(value, time):
+            return {"t": value.isoformat()}
+        if isinstance(value, Decimal):
+            return {"dec": str(value)}
+        if isinstance(value, UUID):
+            return str(value)
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        raise TypeError(f"{type(value).__name__} cannot be stored in a cursor")
+
+    @staticmethod
+    def decode_value(value):
+        if not isinstance(value, dict):
+            return value
+        if "dt" in value:
+            return parse_datetime(value["dt"])
+        if "d" in value:
+            return parse_date(value["d"])
+        if "t" in value:
+            return parse_time(value["t"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError("unknown cursor value")
@@ -0,0 +1,92 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def plan_related_lookups(serializer, model):
+    """
+    Walk a serializer's fields (and nested serializers) and return the
+    (select_related, prefetch_related) lookups needed to render `model`
+    instances without per-row queries.
+
+    Forward foreign keys are joined with select_related until the path
+    crosses a to-many relation; from there on every relation is prefetched.
+    Method fields and properties are opaque and left to view overrides, or
+    to the serializer's Meta.prefetch_related_fields ({field name: [lookups]},
+    e.g. a Prefetch with to_attr), applied while the field is rendered.
+    """
+    target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    select_related, prefetch_related = [], []
+    _walk(target, model, "", False, select_related, prefetch_related)
+    for name, lookups in declared_prefetches(target).items():
+        if name in target.fields:
+            prefetch_related.extend(lookups)
+    return select_related, prefetch_related
+
+
+def declared_prefetches(serializer):
+    meta = getattr(serializer, "Meta", None)
+    return getattr(meta, "prefetch_related_fields", {})
+
+
+def _walk(serializer, model, prefix, through_many, select_related, prefetch_related):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            continue
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # Reads the *_id column, no join needed
+            continue
+
+        current_model = model
+        path = prefix
+        many = through_many
+        resolved = True
+        for attr in field.source.split("."):
+            try:
+                model_field = current_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                resolved = False
+                break
+            if not model_field.is_relation:
+                resolved = False
+                break
+
+            path = f"{path}{attr}"
+            if model_field.many_to_many or model_field.one_to_many:
+                many = True
+            lookups = prefetch_related if many else select_related
+            if path not in lookups:
+                lookups.append(path)
+            current_model = model_field.related_model
+            path = f"{path}__"
+
+        if not resolved:
+            continue
+
+        nested = field.child_relation if isinstance(field, serializers.ManyRelatedField) else field
+        if isinstance(nested, serializers.ListSerializer):
+            nested = nested.child
+        if isinstance(nested, serializers.Serializer):
+            _walk(nested, current_model, path, many, select_related, prefetch_related)
+
+
+def apply_related_lookups(queryset, select_related=(), prefetch_related=()):
+    """Add lookups to a queryset, letting explicit Prefetch objects win over planned paths."""
+    explicit = {
+        lookup.prefetch_to
+        for lookup in list(queryset._prefetch_related_lookups) + list(prefetch_related)
+        if isinstance(lookup, Prefetch)
+    }
+    # Prefetch objects go first so planned paths through them reuse their querysets
+    prefetch_related = [lookup for lookup in prefetch_related if isinstance(lookup, Prefetch)] + [
+        lookup
+        for lookup in prefetch_related
+        if not isinstance(lookup, Prefetch) and lookup not in explicit
+    ]
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
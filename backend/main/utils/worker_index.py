@@ -0,0 +1,102 @@
+import threading
+import time
+
+from django.db import connection, transaction
+
+
+class WorkerIndex:
+    """
+    # WorkerIndex
+    Holder of an in-memory index local to the worker process, such as the
+    book autocomplete and facet indexes.
+
+    - get() builds the index on first use, applies the keys changed since
+      the last call, and every `refresh_interval` seconds starts a rebuild
+      in a background thread while the current index keeps serving.
+    - changed(keys) records written rows once the write transaction
+      commits, so a query can neither read them before they exist nor
+      keep a rolled back write. Nothing is recorded before the first build.
+    - Keys changed while a build runs are applied again to the new index,
+      which may have read their rows before the write.
+
+    `build()` returns a new index read from the database and
+    `apply(index, keys)` updates an index with the current rows of `keys`.
+    """
+
+    def __init__(self, build, apply, refresh_interval):
+        self.build = build
+        self.apply = apply
+        self.refresh_interval = refresh_interval
+        self.index = None
+        self.built_at = None
+        self.lock = threading.Lock()  # first build, applying changes and swapping in rebuilds
+        self.pending = set()  # keys changed since the last get()
+        self.rebuilding = None  # keys changed since the running build started
+        self.pending_lock = threading.Lock()
+        self.refreshing = threading.Event()
+
+    @property
+    def active(self):
+        """Whether changes are being recorded: the index is loaded or being built."""
+        return self.index is not None or self.rebuilding is not None
+
+    def get(self):
+        if self.index is None:
+            with self.lock:
+                if self.index is None:
+                    self._start_build()
+                    try:
+                        self._finish_build(self.build())
+                    finally:
+                        self._end_build()
+        elif time.monotonic() - self.built_at > self.refresh_interval and not self.refreshing.is_set():
+            self.refreshing.set()
+            self._start_build()
+            threading.Thread(target=self._refresh, daemon=True).start()
+
+        if self.pending:
+            with self.lock:
+                with self.pending_lock:
+                    keys, self.pending = self.pending, set()
+                if keys:
+                    self.apply(self.index, keys)
+        return self.index
+
+    def changed(self, keys):
+        """Record changed keys when the current transaction commits (right away outside one)."""
+        keys = set(keys)
+        if keys:
+            transaction.on_commit(lambda: self._record(keys))
+
+    def _record(self, keys):
+        with self.pending_lock:
+            if self.index is not None:
+                self.pending |= keys
+            if self.rebuilding is not None:
+                self.rebuilding |= keys
+
+    def _refresh(self):
+        try:
+            index = self.build()
+            with self.lock:
+                self._finish_build(index)
+        finally:
+            self._end_build()
+            connection.close()
+            self.refreshing.clear()
+
+    def _start_build(self):
+        with self.pending_lock:
+            self.rebuilding = set()
+
+    def _finish_build(self, index):
+        """Swap in a built index, with the keys changed during the build left to apply."""
+        with self.pending_lock:
+            self.pending |= self.rebuilding
+            self.rebuilding = set()
+        self.built_at = time.monotonic()
+        self.index = index
+
+    def _end_build(self):
+        with self.pending_lock:
+            self.rebuilding = None